@@ -1,33 +1,220 @@
+import json
 import logging
 import os
 import platform
-import subprocess
 import qdarktheme
+import sqlite3
 import sys
+import threading
+import time
 
 from PyQt6.QtGui import QIcon, QIntValidator, QFontDatabase
-from PyQt6.QtWidgets import QMainWindow, QApplication, QFileDialog, QMessageBox
-from PyQt6.QtCore import QThread, pyqtSignal
-
+from PyQt6.QtWidgets import (
+    QMainWindow, QAbstractItemView, QApplication, QCheckBox, QComboBox,
+    QFileDialog, QHeaderView, QLineEdit, QMessageBox, QPushButton,
+    QTableView)
+from PyQt6.QtCore import QThread, QTimer, Qt, pyqtSignal
+
+from src.cache import ResultCache
+from src.catalog import (
+    CACHED, CANCELLED, ERROR, FAILED, RUNNING, SUCCESS, TIMEOUT, RunCatalog)
+from src.decimate import MinMaxStream
 from src.gui import Ui_MainWindow
+from src.history_view import RunHistoryModel
+from src.logtail import LogTailer
 from src.logger import setup_logging
-from src.result import run_simulation
+from src.monitor import OutputMonitor
+from src.profiling import PROFILE_FLAGS, format_report, profile_run
+from src.pyramid import save_pyramid
+from src.result import split_variables
+from src.resultfile import GrowingResult
+from src.stats import format_stats, load_metrics
+from src.simulation import (
+    STDERR_FILE, STDOUT_FILE, SimulationAborted, create_scratch_directory,
+    finalize_run, run_model, validate_times)
 
 FILE_DIALOG_TITLE = "Please Select Model Executable"
+# Wall-clock limit of a single simulation run in seconds.
+RUN_TIMEOUT = 6 * 3600
+# Resource limits applied to the model process (POSIX only), e.g.
+# {"cpu_seconds": 3600, "memory_bytes": 8 * 1024 ** 3}; "output_bytes"
+# caps its stdout.log and stderr.log (default src.simulation.OUTPUT_LIMIT).
+RUN_LIMITS = {}
+# Milliseconds between two refreshes of the live plot of a running model.
+LIVE_PLOT_INTERVAL = 1000
+# Min/max buckets per line of the live plot (between this and twice it).
+LIVE_PLOT_BUCKETS = 1024
+# Milliseconds of typing pause before the history search is run.
+SEARCH_DELAY = 250
+# (label, days back) of the date filter of the history page.
+DATE_RANGES = (("Any time", None), ("Last 24 hours", 1), ("Last 7 days", 7),
+               ("Last 30 days", 30), ("Last year", 365))
 
 
 class Libloader(QThread):
     """
-    A background thread to preload matplotlib and scipy.
+    A background thread to preload matplotlib.
     """
     loaded = pyqtSignal()
 
     def run(self):
         """
-        Preload matplotlib and scipy to avoid delays.
+        Preload matplotlib and its Qt canvas to avoid delays when the plot
+        page is first shown. Results are read with NumPy, so scipy is not
+        needed.
+        """
+        import src.plot_panel  # noqa: F401
+
+
+class LivePlotReader(QThread):
+    """
+    A background thread that follows the result file of a running model
+    and sends the points to plot to the GUI.
+
+    Every LIVE_PLOT_INTERVAL only the time points written since the last
+    read are read and folded into min/max envelopes, so the GUI thread
+    merely draws a bounded number of points however long the run.
+    """
+    updated = pyqtSignal(object, object)
+
+    def __init__(self, result_file):
+        super().__init__()
+        self.result_file = result_file
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Stop following the result file and wait for the thread to end,
+        after which the file is no longer open.
         """
-        from scipy.io import loadmat
-        from matplotlib import pyplot as plt
+        self.stop_event.set()
+        self.wait()
+
+    def run(self):
+        """
+        Read the result file until stopped, emitting the names shown on
+        each axes and a mapping of every name to its points.
+        """
+        growing = GrowingResult(self.result_file)
+        variables = names = stream = None
+        while not self.stop_event.wait(LIVE_PLOT_INTERVAL / 1000):
+            try:
+                if stream is None:
+                    if not growing.open():
+                        continue
+                    variables = split_variables(growing.result)
+                    names = variables[0] + variables[1]
+                    stream = MinMaxStream(len(names), LIVE_PLOT_BUCKETS)
+                while not self.stop_event.is_set():
+                    time_points, values = growing.poll(names)
+                    if not len(time_points):
+                        break
+                    stream.extend(time_points, values)
+            except (OSError, ValueError) as e:
+                logging.debug("Live plot: cannot read %s: %s",
+                              self.result_file, e)
+                continue
+            if growing.samples >= 2:
+                self.updated.emit(variables, {
+                    name: stream.points(row)
+                    for row, name in enumerate(names)})
+
+
+class LogImporter(QThread):
+    """
+    A background thread that imports the runs recorded only in the
+    application log into the run catalog, see `LogTailer`.
+    """
+    imported = pyqtSignal(int)
+
+    def __init__(self, catalog_path):
+        super().__init__()
+        self.catalog_path = catalog_path
+
+    def run(self):
+        """
+        Import the log and emit the number of runs imported. The catalog
+        is opened again on this thread, since a SQLite connection cannot
+        be used from another thread than the one that opened it.
+        """
+        try:
+            catalog = RunCatalog(self.catalog_path)
+        except sqlite3.Error as e:
+            logging.warning("Could not import the log history: %s", e)
+            self.imported.emit(0)
+            return
+        try:
+            self.imported.emit(LogTailer(catalog).update())
+        finally:
+            catalog.close()
+
+
+class SimulationWorker(QThread):
+    """
+    A background thread that runs a model executable, parses its output
+    as it arrives and reports progress back to the GUI through signals.
+    """
+    progress = pyqtSignal(str)
+    completed = pyqtSignal(int)
+    failed = pyqtSignal(str)
+    aborted = pyqtSignal(str)
+
+    def __init__(self, exe_path, overrides, run_dir, profile=False):
+        """
+        Store the executable, overrides and run directory of the run.
+        """
+        super().__init__()
+        self.exe_path = exe_path
+        self.overrides = overrides
+        self.run_dir = run_dir
+        self.profile = profile
+        self.monitor = OutputMonitor(
+            overrides.get("startTime"), overrides.get("stopTime"))
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Ask the running model to stop; its process tree is terminated.
+        """
+        self.cancel_event.set()
+
+    def on_time(self, simulated_time):
+        """
+        Record the simulated time the model reached and emit the progress.
+        """
+        if self.monitor.advance(simulated_time):
+            self.progress.emit(self.monitor.status_text())
+
+    def run(self):
+        """
+        Execute the model and emit its output and exit code. The plot
+        pyramid of a successful run is written here too, off the GUI
+        thread; cancelling meanwhile only skips the pyramid.
+        """
+        try:
+            returncode = run_model(
+                self.exe_path,
+                self.overrides,
+                self.run_dir,
+                extra_args=PROFILE_FLAGS if self.profile else (),
+                on_stdout=self.monitor.feed,
+                on_stderr=self.monitor.feed,
+                on_time=self.on_time,
+                timeout=RUN_TIMEOUT,
+                cancel_event=self.cancel_event,
+                limits=RUN_LIMITS,
+            )
+        except SimulationAborted as e:
+            self.aborted.emit(str(e))
+            return
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        if returncode == 0 and self.monitor.succeeded:
+            self.progress.emit("Preparing the plot data...")
+            save_pyramid(os.path.join(self.run_dir, "result.mat"),
+                         self.cancel_event)
+        self.completed.emit(returncode)
 
 
 class Launcher(QMainWindow):
@@ -69,6 +256,18 @@ class Launcher(QMainWindow):
         self.stop_time = None
         self.file_name = None
         self.change_theme = None
+        self.worker = None
+        self.result_cache = ResultCache()
+        self.cache_key = None
+        self.run_id = None
+        self.plot_panel = None
+        try:
+            self.catalog = RunCatalog()
+        except sqlite3.Error as e:
+            logging.warning("Run catalog unavailable: %s", e)
+            self.catalog = None
+        self.live_plot_reader = None
+        self.live_plot_restart = False
 
         # Connect UI buttons and fields to their respective event handlers
         self.ui.set_but.clicked.connect(self.on_set_button)
@@ -87,6 +286,101 @@ class Launcher(QMainWindow):
         self.ui.clear_time_but.clicked.connect(self.clear_time)
         self.ui.launch_but.setEnabled(False)
 
+        # Cancel button, shown in place of the Launch button during a run
+        self.cancel_but = QPushButton("  Cancel", parent=self.ui.widget_2)
+        self.cancel_but.setMinimumSize(self.ui.launch_but.minimumSize())
+        self.cancel_but.setMaximumSize(self.ui.launch_but.maximumSize())
+        self.cancel_but.setFont(self.ui.launch_but.font())
+        self.cancel_but.setCursor(self.ui.launch_but.cursor())
+        self.cancel_but.setStyleSheet(
+            self.ui.launch_but.styleSheet()
+            .replace("#28A745", "#DC3545")
+            .replace("#218838", "#C82333")
+            .replace("#1E7E34", "#BD2130"))
+        self.cancel_but.setIcon(QIcon(":/icons/res/ui_icons/exit.svg"))
+        self.cancel_but.setIconSize(self.ui.launch_but.iconSize())
+        self.ui.horizontalLayout_3.insertWidget(
+            self.ui.horizontalLayout_3.indexOf(self.ui.launch_but) + 1,
+            self.cancel_but)
+        self.cancel_but.hide()
+        self.cancel_but.clicked.connect(self.on_cancel_button)
+
+        # Profile run option, below the plot option
+        self.profile_check_but = QCheckBox(
+            " Profile run", parent=self.ui.groupBox_2)
+        self.profile_check_but.setCursor(self.ui.plot_check_but.cursor())
+        self.profile_check_but.setStyleSheet(
+            self.ui.plot_check_but.styleSheet())
+        self.profile_check_but.setToolTip(
+            "Collect per-equation timings (model must be compiled with "
+            "profiling enabled)")
+        self.ui.verticalLayout_4.addWidget(self.profile_check_but)
+
+        # Plots menu button, below History; the page itself is created on
+        # first use
+        self.plots_but = QPushButton("Plots", parent=self.ui.menu_widget)
+        self.plots_but.setMinimumSize(self.ui.history_but.minimumSize())
+        self.plots_but.setMaximumSize(self.ui.history_but.maximumSize())
+        self.plots_but.setFont(self.ui.history_but.font())
+        self.plots_but.setCursor(self.ui.history_but.cursor())
+        self.plots_but.setStyleSheet(self.ui.history_but.styleSheet())
+        self.plots_but.setIcon(QIcon(":/icons/res/ui_icons/time-fast.svg"))
+        self.plots_but.setIconSize(self.ui.history_but.iconSize())
+        self.ui.verticalLayout.insertWidget(
+            self.ui.verticalLayout.indexOf(self.ui.history_but) + 1,
+            self.plots_but)
+        self.plots_but.clicked.connect(self.on_plots_button)
+
+        # History table, in place of the list of the history page; rows
+        # are fetched from the run catalog as the table is scrolled
+        self.history_model = RunHistoryModel(self.catalog, self)
+        self.log_importer = None
+        self.history_view = QTableView(parent=self.ui.page_3)
+        self.history_view.setGeometry(self.ui.listWidget.geometry())
+        self.history_view.setStyleSheet(self.ui.listWidget.styleSheet())
+        self.history_view.setModel(self.history_model)
+        self.history_view.setSortingEnabled(True)
+        self.history_view.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        self.history_view.setSelectionBehavior(
+            QAbstractItemView.SelectionBehavior.SelectRows)
+        self.history_view.setEditTriggers(
+            QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.history_view.verticalHeader().hide()
+        self.history_view.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.ResizeMode.Stretch)
+        self.ui.listWidget.hide()
+
+        # Search box and status/date filters above the history table
+        self.history_search = QLineEdit(parent=self.ui.page_3)
+        self.history_search.setGeometry(110, 28, 140, 24)
+        self.history_search.setStyleSheet(self.ui.listWidget.styleSheet())
+        self.history_search.setPlaceholderText("Search runs")
+        self.history_search.setClearButtonEnabled(True)
+        self.history_search.setToolTip(
+            "Words in the model, path, overrides, status, message or output "
+            "of a run; end a word with * to match a prefix. Conditions such "
+            "as stopTime>500 select runs by an override.")
+        self.history_status = QComboBox(parent=self.ui.page_3)
+        self.history_status.setGeometry(255, 28, 110, 24)
+        self.history_status.setStyleSheet(self.ui.listWidget.styleSheet())
+        self.history_status.addItem("All statuses", None)
+        for status in (SUCCESS, FAILED, ERROR, TIMEOUT, CANCELLED, CACHED,
+                       RUNNING):
+            self.history_status.addItem(status.capitalize(), status)
+        self.history_date = QComboBox(parent=self.ui.page_3)
+        self.history_date.setGeometry(370, 28, 111, 24)
+        self.history_date.setStyleSheet(self.ui.listWidget.styleSheet())
+        for label, days in DATE_RANGES:
+            self.history_date.addItem(label, days)
+        self.history_search_timer = QTimer(self)
+        self.history_search_timer.setSingleShot(True)
+        self.history_search_timer.setInterval(SEARCH_DELAY)
+        self.history_search_timer.timeout.connect(self.filter_history)
+        self.history_search.textChanged.connect(
+            self.history_search_timer.start)
+        self.history_status.currentIndexChanged.connect(self.filter_history)
+        self.history_date.currentIndexChanged.connect(self.filter_history)
+
         # Add input validators to restrict start/stop time to integers
         # within range 0-10000
         validator = QIntValidator(0, 10000, self)
@@ -144,10 +438,10 @@ class Launcher(QMainWindow):
             return
 
         # Show an error message if stop time <= start time.
-        if self.stop_time <= self.start_time:
-            self.show_message_box(
-                "Error", "Stop time must be greater than start time", "warning"
-            )
+        try:
+            validate_times(self.start_time, self.stop_time)
+        except ValueError as e:
+            self.show_message_box("Error", str(e), "warning")
             return
 
     def on_folder_button(self):
@@ -176,7 +470,8 @@ class Launcher(QMainWindow):
     def on_launch_button(self):
         """
         Handle the launch button click event.
-        Validate inputs and execute the selected executable as a subprocess.
+        Validate inputs and start the selected executable on a
+        background worker so the GUI stays responsive.
         """
         # Validate all necessary inputs and selections before launching.
 
@@ -190,98 +485,190 @@ class Launcher(QMainWindow):
                 "Error", "Please enter a start and stop time", "warning"
             )
             return
-        if self.stop_time <= self.start_time:
-            self.show_message_box(
-                "Error", "Stop time must be greater than start time", "warning"
-            )
+        try:
+            validate_times(self.start_time, self.stop_time)
+        except ValueError as e:
+            self.show_message_box("Error", str(e), "warning")
             return
         if not self.working_directory:
             self.show_message_box(
                 "Error", FILE_DIALOG_TITLE, "warning"
             )
             return
+        if self.worker is not None and self.worker.isRunning():
+            self.show_message_box(
+                "Error", "A simulation is already running", "warning"
+            )
+            return
         self.ui.status_label.setText("Launching Simulation...")
 
-        # Run the simulation executable as a subprocess.
-        try:
-            if not os.path.isfile(self.exe_path):
-                raise FileNotFoundError(
-                    f"File not found: {self.exe_path}"
-                )
-            # Correct the handling of the arguments for 'mat'.
-            self.ui.status_label.setText("Running Subprocess...")
-            logging.info("Exporting results to output/result.mat")
-            try:
-                result = subprocess.run(
-                    [
-                        self.exe_path,
-                        f"-override=startTime={self.start_time},stopTime={self.stop_time}",
-                        "-r=result.mat",
-                    ],
-                    cwd=self.working_directory,
-                    capture_output=True,
-                    text=True,
-                )
-            except Exception as e:
-                self.ui.status_label.setText(
-                    "Simulation failed. Check the log file...")
-                logging.error("Status: Error running subprocess: %s", e)
-                self.show_message_box(
-                    "Error",
-                    "Error running subprocess. Please check the log file.",
-                    "critical"
-                )
-                return
-        except FileNotFoundError as e:
+        if not os.path.isfile(self.exe_path):
             self.ui.status_label.setText(
                 "Simulation failed. Check the log file...")
-            logging.error("Status: File not found: %s", e.filename)
+            logging.error("Status: File not found: %s", self.exe_path)
             self.show_message_box(
                 "Error",
-                f"File not found: {e.filename}",
+                f"File not found: {self.exe_path}",
                 "critical"
             )
-        except subprocess.CalledProcessError as e:
+            return
+
+        # Reuse the result of an identical earlier run if there is one.
+        # Profile runs always execute, since their timings are the point.
+        overrides = {"startTime": self.start_time, "stopTime": self.stop_time}
+        profile = self.profile_check_but.isChecked()
+        try:
+            self.cache_key = self.result_cache.key(self.exe_path, overrides)
+            cached_result = (None if profile
+                             else self.result_cache.lookup(self.cache_key))
+        except OSError as e:
+            logging.warning("Result cache unavailable: %s", e)
+            self.cache_key = cached_result = None
+        if cached_result:
+            self.record_run_start(overrides, os.path.dirname(cached_result))
+            logging.info("Status: Simulation skipped, cached result: %s",
+                         cached_result)
+            self.ui.status_label.setText("Loaded cached simulation result")
+            self.record_run_end(CACHED, 0)
+            self.show_plots(cached_result, f"{self.file_name} (cached)")
+            return
+
+        # Give the run its own scratch directory so concurrent runs of
+        # the same model never overwrite each other's result file.
+        try:
+            run_dir = create_scratch_directory()
+        except OSError as e:
             self.ui.status_label.setText(
                 "Simulation failed. Check the log file...")
-            logging.error("Status: Subprocess failed: %s", e.stderr)
+            logging.error("Status: Error creating output directory: %s", e)
             self.show_message_box(
                 "Error",
-                "Simulation failed to run.",
+                "Error creating output directory.",
                 "critical"
             )
             return
 
+        # Run the simulation executable on a background worker.
+        self.ui.status_label.setText("Running Subprocess...")
+        logging.info("Exporting results to %s",
+                     os.path.join(run_dir, "result.mat"))
+        self.worker = SimulationWorker(
+            self.exe_path,
+            overrides,
+            run_dir,
+            profile=profile
+        )
+        self.worker.progress.connect(self.ui.status_label.setText)
+        self.worker.completed.connect(self.on_simulation_completed)
+        self.worker.failed.connect(self.on_simulation_failed)
+        self.worker.aborted.connect(self.on_simulation_aborted)
+        self.record_run_start(overrides, run_dir)
+        self.set_running(True)
+        self.worker.start()
+
+    def set_running(self, running):
+        """
+        Swap the Launch button for the Cancel button while a run is active.
+        """
+        self.ui.launch_but.setVisible(not running)
+        self.ui.launch_but.setEnabled(bool(self.exe_path))
+        self.cancel_but.setVisible(running)
+        self.cancel_but.setEnabled(running)
+        if self.live_plot_reader is not None:
+            # Stopped before the run is finalized: the result file must
+            # not be open while it is moved.
+            self.live_plot_reader.stop()
+            self.live_plot_reader = None
+        if running and self.ui.plot_check_but.isChecked():
+            self.live_plot_restart = True
+            self.live_plot_reader = LivePlotReader(
+                os.path.join(self.worker.run_dir, "result.mat"))
+            self.live_plot_reader.updated.connect(self.update_live_plot)
+            self.live_plot_reader.start()
+
+    def update_live_plot(self, variables, points):
+        """
+        Plot the time points the running model has written so far. The
+        plot page is shown once the first points are available.
+        """
+        if self.live_plot_reader is None:
+            # Read before the run ended; its final result is shown instead.
+            return
+        panel = self.get_plot_panel()
+        panel.show_live(variables, points, restart=self.live_plot_restart)
+        if self.live_plot_restart:
+            self.live_plot_restart = False
+            self.ui.stackedWidget.setCurrentWidget(panel)
+
+    def on_cancel_button(self):
+        """
+        Cancel the running simulation.
+        """
+        if self.worker is not None and self.worker.isRunning():
+            self.cancel_but.setEnabled(False)
+            self.ui.status_label.setText("Cancelling Simulation...")
+            self.worker.cancel()
+
+    def on_simulation_aborted(self, message):
+        """
+        Handle a simulation that was cancelled or ran into its timeout.
+        """
+        self.set_running(False)
+        self.ui.status_label.setText(message)
+        logging.error("Status: %s", message)
+        logging.error("Run files kept in %s", self.worker.run_dir)
+        self.record_run_end(
+            CANCELLED if self.worker.cancel_event.is_set() else TIMEOUT,
+            message=message, output="\n".join(self.worker.monitor.tail))
+
+    def on_simulation_failed(self, message):
+        """
+        Handle a simulation that could not be started.
+        """
+        self.set_running(False)
+        self.ui.status_label.setText(
+            "Simulation failed. Check the log file...")
+        logging.error("Status: Error running subprocess: %s", message)
+        self.record_run_end(ERROR, message=message)
+        self.show_message_box(
+            "Error",
+            "Error running subprocess. Please check the log file.",
+            "critical"
+        )
+
+    def on_simulation_completed(self, returncode):
+        """
+        Handle the end of a simulation run: move the result file into the
+        output directory and plot it if requested.
+        """
+        self.set_running(False)
+        monitor = self.worker.monitor
+        stdout = "\n".join(monitor.tail)
+        logging.debug("Simulation exited with code %s (%d lines, %d warnings)",
+                      returncode, monitor.line_count, monitor.warnings)
+
         # Handle simulation results and show appropriate message.
-        if result.stdout:
-            if "LOG_SUCCESS" in result.stdout:
+        target_dir = None
+        metrics = None
+        if monitor.line_count:
+            if monitor.succeeded and returncode == 0:
                 self.ui.status_label.setText(
                     "Simulation successful. Check the log file...")
                 logging.info("Status: Simulation successful.")
-                logging.info("STDOUT:\n%s", result.stdout.strip())
-                self.show_message_box(
-                    "Simulation Status",
-                    "Simulation successful. Check output directory...",
-                    "info"
-                )
                 try:
-                    if not os.path.exists("output"):
-                        os.mkdir("output")
-
-                    target_dir = os.path.join("output", self.file_name)
-                    original_dir = target_dir
-                    counter = 1
-
-                    # Add a numeric suffix until a unique name is found
-                    while os.path.exists(target_dir):
-                        target_dir = f"{original_dir}_{counter}"
-                        counter += 1
-
-                    os.mkdir(target_dir)
-                    os.rename(
-                        f"{self.working_directory}/result.mat", os.path.join(
-                            target_dir, "result.mat"))
+                    target_dir = finalize_run(
+                        self.worker.run_dir, "output", self.file_name)
+                    logging.info("Output directory: %s", target_dir)
+                    logging.info("Output: %s; see %s and %s",
+                                 monitor.summary(),
+                                 os.path.join(target_dir, STDOUT_FILE),
+                                 os.path.join(target_dir, STDERR_FILE))
+                    report = (profile_run(target_dir, self.worker.exe_path)
+                              if self.worker.profile else None)
+                    metrics = load_metrics(target_dir)
+                    self.show_run_metrics(metrics, report)
                 except Exception as e:
+                    target_dir = None
                     self.ui.status_label.setText(
                         "Simulation failed. Check the log file...")
                     logging.error("Status: Error creating output directory: %s", e)
@@ -295,11 +682,11 @@ class Launcher(QMainWindow):
                 self.ui.status_label.setText(
                     "Simulation failed. Check the log file...")
                 logging.error("Status: Simulation failed.")
-                logging.error("STDOUT:\n%s", result.stdout.strip())
-                logging.error(
-                    "STDERR:\nModel may not have necessary dependent files "
-                    "to run the simulation"
-                )
+                logging.error("Run files kept in %s", self.worker.run_dir)
+                logging.error("Output: %s; see %s and %s",
+                              monitor.summary(),
+                              os.path.join(self.worker.run_dir, STDOUT_FILE),
+                              os.path.join(self.worker.run_dir, STDERR_FILE))
                 self.show_message_box(
                     "Simulation Status",
                     "Simulation failed. Check the log file.",
@@ -309,17 +696,116 @@ class Launcher(QMainWindow):
             self.ui.status_label.setText(
                 "Simulation failed. Check the log file...")
             logging.error("Status: Simulation failed.")
-            logging.exception("An error occurred during simulation.")
+            logging.error("Simulation produced no output (exit code %s).",
+                          returncode)
             self.show_message_box(
                 "Simulation Status", "An error occurred", "critical"
             )
 
+        if target_dir:
+            self.record_run_end(SUCCESS, returncode, target_dir, metrics,
+                                output=stdout)
+        else:
+            self.record_run_end(FAILED, returncode,
+                                metrics=load_metrics(self.worker.run_dir),
+                                message="; ".join(monitor.errors) or None,
+                                output=stdout)
+
+        if target_dir:
+            self.cache_result(os.path.join(target_dir, "result.mat"))
+            self.show_plots(os.path.join(target_dir, "result.mat"))
+        self.ui.status_label.setText("Screening Task - OpenModelica GUI")
+
+    def record_run_start(self, overrides, output_dir):
+        """
+        Add the run being launched to the run catalog.
+        """
+        self.run_id = None
+        if self.catalog is None:
+            return
+        try:
+            self.run_id = self.catalog.start_run(
+                self.file_name, self.exe_path, overrides, output_dir)
+            logging.info("Run ID: %s", self.run_id)
+        except sqlite3.Error as e:
+            logging.warning("Could not record the run: %s", e)
+
+    def record_run_end(self, status, returncode=None, output_dir=None,
+                       metrics=None, message=None, output=None):
+        """
+        Record the outcome of the current run in the run catalog.
+        """
+        if self.catalog is None or self.run_id is None:
+            return
+        try:
+            self.catalog.finish_run(self.run_id, status, returncode,
+                                    output_dir, metrics, message, output)
+        except sqlite3.Error as e:
+            logging.warning("Could not record the run: %s", e)
+        self.run_id = None
+
+    def show_run_metrics(self, metrics, report=None):
+        """
+        Log the runtime statistics (and profile report) of a successful run
+        and show a summary of them with the success message.
+        """
+        summary = format_stats(metrics)
+        if metrics:
+            logging.info("Metrics: %s", json.dumps(metrics))
+        if report is not None:
+            logging.info("Profile:\n%s", format_report(report))
+            summary += "\n\nMost expensive entries:\n" + format_report(
+                report, limit=5)
+        self.ui.status_label.setToolTip(summary)
+        message = "Simulation successful. Check output directory..."
+        if summary:
+            message += "\n\n" + summary
+        self.show_message_box("Simulation Status", message, "info")
+
+    def cache_result(self, result_file):
+        """
+        Store the result of the finished run in the result cache.
+        """
+        if not self.cache_key:
+            return
+        try:
+            self.result_cache.store(
+                self.cache_key,
+                result_file,
+                self.worker.exe_path,
+                self.worker.overrides
+            )
+        except OSError as e:
+            logging.warning("Could not cache the simulation result: %s", e)
+
+    def get_plot_panel(self):
+        """
+        Return the plot page, adding it to the stacked widget on first use.
+        """
+        if self.plot_panel is None:
+            from src.plot_panel import PlotPanel
+            self.plot_panel = PlotPanel(self.ui.stackedWidget)
+            self.ui.stackedWidget.addWidget(self.plot_panel)
+        return self.plot_panel
+
+    def on_plots_button(self):
+        """
+        Switch to the plot page.
+        """
+        self.ui.stackedWidget.setCurrentWidget(self.get_plot_panel())
+
+    def show_plots(self, result_file, label=None):
+        """
+        Plot a result file on the plot page if the "Plot the o/p" option
+        is checked.
+        """
         plot = self.ui.plot_check_but.isChecked()
         try:
             if plot:
                 self.ui.status_label.setText("Showing the plots...")
-                run_simulation(
-                    os.path.join(target_dir, "result.mat"))
+                panel = self.get_plot_panel()
+                panel.add_run(result_file, label)
+                self.ui.stackedWidget.setCurrentWidget(panel)
 
         except Exception as e:
             self.ui.status_label.setText("Cannot show the plots...")
@@ -329,7 +815,6 @@ class Launcher(QMainWindow):
                 "Error showing plots. Please check the log file.",
                 "critical"
             )
-        self.ui.status_label.setText("Screening Task - OpenModelica GUI")
 
     def text_changed_stop(self):
         """
@@ -349,36 +834,43 @@ class Launcher(QMainWindow):
 
     def on_history_button(self):
         """
-        Handles the event triggered by the History button,
-        displaying log details in a list widget.
-        If the log file exists, information regarding selected models,
-        model paths, and statuses is extracted and
-        displayed in the application.
+        Handles the event triggered by the History button, showing the
+        run catalog in the history table. Only the first rows are read;
+        the rest are fetched as the table is scrolled.
+
+        Runs found only in the application log (from before the catalog,
+        or from older launchers sharing the log) are imported on a
+        background thread, and the table is refreshed once they are in;
+        only the part of the log appended since the last visit is read.
         """
         self.ui.stackedWidget.setCurrentIndex(2)
-        if os.path.exists("logs/OPLauncher.log"):
-            self.ui.listWidget.clear()
-
-            with open("logs/OPLauncher.log", 'r') as f:
-                for line in f:
-
-                    if "Selected Model:" in line:
-                        line = line.split("Selected Model:")[1]
-                        self.ui.listWidget.addItem("Executable: " + line)
-
-                    if "Model Path:" in line:
-                        model = line.split("Model Path:")
-                        self.ui.listWidget.addItems(model)
-
-                    if "Status:" in line:
-                        status = line.split("Status:")[1]
-                        self.ui.listWidget.addItem(
-                            "Status: " + status)
-                        self.ui.listWidget.addItem(
-                            "-----------------------------------------------------------------------------------")
+        self.filter_history()
+        if self.catalog is not None and (
+                self.log_importer is None
+                or not self.log_importer.isRunning()):
+            self.log_importer = LogImporter(self.catalog.path)
+            self.log_importer.imported.connect(self.on_log_imported)
+            self.log_importer.start()
+
+    def on_log_imported(self, imported):
+        """
+        Show the runs imported from the log by the background import.
+        """
+        if imported:
+            logging.debug("Imported %d runs from the log", imported)
+            self.filter_history()
 
-        else:
-            self.ui.listWidget.addItem("No Logs Found")
+    def filter_history(self):
+        """
+        Show the runs matching the search box and the status and date
+        filters of the history page.
+        """
+        self.history_search_timer.stop()
+        days = self.history_date.currentData()
+        self.history_model.set_filters(
+            text=self.history_search.text(),
+            status=self.history_status.currentData(),
+            since=None if days is None else time.time() - days * 86400)
 
     def clear(self):
         """
@@ -403,6 +895,15 @@ class Launcher(QMainWindow):
         logging.info("Start and stop time cleared")
         self.ui.status_label.setText("Start and stop time cleared")
 
+    def closeEvent(self, event):
+        """
+        Stop a running simulation before the window closes.
+        """
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
     def show_message_box(self, title, message, icon_type):
         """
         Display a message box with the specified title, message, and icon type.
@@ -419,9 +920,10 @@ class Launcher(QMainWindow):
             QMessageBox.critical(self, title, message)
 
 
-# Create and run the application.
-app = QApplication([])
-setup_logging()  # Set up application logging.
-window = Launcher()
-window.show()
-app.exec()
+if __name__ == "__main__":
+    # Create and run the application.
+    app = QApplication([])
+    setup_logging()  # Set up application logging.
+    window = Launcher()
+    window.show()
+    app.exec()
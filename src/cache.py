@@ -0,0 +1,154 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+CACHE_DIR = "cache"
+RESULT_FILE = "result.mat"
+ENTRY_FILE = "entry.json"
+
+
+def _hash_file(path, digest):
+    """
+    Feed the contents of a file into a hash object.
+    """
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+
+
+class ResultCache:
+    """
+    A content-addressed cache of simulation results.
+
+    A result is keyed on the SHA-256 of the model executable, the contents
+    of the model's `*_init.xml` files and the full, order-independent set
+    of overrides. Each entry is a directory `<root>/<key>` holding the
+    cached `result.mat` and an `entry.json` describing it. Entries are
+    evicted least-recently-used first once the cache grows beyond
+    `max_bytes` or `max_entries`, and whenever they are older than
+    `max_age` seconds.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=2 * 1024 ** 3,
+                 max_entries=500, max_age=30 * 24 * 3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age = max_age
+        # File hashes, keyed on (path, size, mtime) so that a model and its
+        # init files are only read again when they have been rebuilt.
+        self._fingerprints = {}
+
+    def fingerprint(self, path):
+        """
+        Return the SHA-256 of a file, memoized on its size and mtime.
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._fingerprints:
+            digest = hashlib.sha256()
+            _hash_file(path, digest)
+            self._fingerprints[memo_key] = digest.hexdigest()
+        return self._fingerprints[memo_key]
+
+    def key(self, exe_path, overrides):
+        """
+        Compute the cache key of a run.
+
+        :exe_path: Path to the model executable.
+        :overrides: Mapping of names to values passed through `-override`.
+        """
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint(exe_path).encode())
+        for init_file in sorted(glob.glob(
+                os.path.join(os.path.dirname(exe_path) or ".", "*_init.xml"))):
+            digest.update(os.path.basename(init_file).encode())
+            digest.update(self.fingerprint(init_file).encode())
+        canonical = sorted((str(k), str(v)) for k, v in overrides.items())
+        digest.update(json.dumps(canonical).encode())
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        """
+        Return the cached result file for a key, or None on a miss.
+        A hit refreshes the entry's position in the LRU order.
+        """
+        entry_dir = os.path.join(self.root, key)
+        result_file = os.path.join(entry_dir, RESULT_FILE)
+        if not os.path.isfile(result_file):
+            return None
+        if time.time() - os.path.getmtime(result_file) > self.max_age:
+            self._remove(entry_dir)
+            return None
+        os.utime(os.path.join(entry_dir, ENTRY_FILE))
+        return result_file
+
+    def store(self, key, result_file, exe_path, overrides):
+        """
+        Add a result file to the cache and apply the eviction policy.
+
+        The file is hard linked into the cache when possible and copied
+        otherwise, so storing a fresh result costs no extra disk space on
+        most file systems.
+
+        :return: The path of the cached result file.
+        """
+        entry_dir = os.path.join(self.root, key)
+        os.makedirs(entry_dir, exist_ok=True)
+        cached = os.path.join(entry_dir, RESULT_FILE)
+        if os.path.exists(cached):
+            os.remove(cached)
+        try:
+            os.link(result_file, cached)
+        except OSError:
+            shutil.copy2(result_file, cached)
+        # The result's mtime marks the entry's age, independent of the run.
+        os.utime(cached)
+        with open(os.path.join(entry_dir, ENTRY_FILE), "w") as f:
+            json.dump({
+                "executable": os.path.abspath(exe_path),
+                "overrides": {str(k): str(v) for k, v in overrides.items()},
+                "source": os.path.abspath(result_file),
+                "created": time.time(),
+            }, f, indent=2)
+        self.evict()
+        return cached
+
+    def evict(self):
+        """
+        Remove expired entries, then the least recently used entries until
+        the cache fits in `max_bytes` and `max_entries`.
+        """
+        if not os.path.isdir(self.root):
+            return
+        now = time.time()
+        entries = []
+        for key in os.listdir(self.root):
+            entry_dir = os.path.join(self.root, key)
+            try:
+                size = os.path.getsize(os.path.join(entry_dir, RESULT_FILE))
+                created = os.path.getmtime(os.path.join(entry_dir, RESULT_FILE))
+                used = os.path.getmtime(os.path.join(entry_dir, ENTRY_FILE))
+            except OSError:
+                self._remove(entry_dir)
+                continue
+            if now - created > self.max_age:
+                self._remove(entry_dir)
+                continue
+            entries.append((used, size, entry_dir))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and (total > self.max_bytes
+                           or len(entries) > self.max_entries):
+            _, size, entry_dir = entries.pop(0)
+            total -= size
+            self._remove(entry_dir)
+
+    def _remove(self, entry_dir):
+        logging.debug("Evicting cached result %s", entry_dir)
+        shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,293 @@
+import json
+import os
+import re
+import sqlite3
+import time
+
+CATALOG_FILE = "logs/runs.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    exe_path TEXT NOT NULL,
+    overrides TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL,
+    duration REAL,
+    status TEXT NOT NULL,
+    returncode INTEGER,
+    output_dir TEXT,
+    metrics TEXT,
+    message TEXT,
+    output TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, started);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status, started);
+CREATE INDEX IF NOT EXISTS runs_duration ON runs (duration);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Full-text index over the searchable text of every run, kept in sync
+# with the runs table by triggers.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE runs_fts USING fts5(
+    model, exe_path, overrides, status, message, output,
+    content='runs', content_rowid='id'
+);
+CREATE TRIGGER runs_fts_insert AFTER INSERT ON runs BEGIN
+    INSERT INTO runs_fts (rowid, model, exe_path, overrides, status,
+                          message, output)
+    VALUES (new.id, new.model, new.exe_path, new.overrides, new.status,
+            new.message, new.output);
+END;
+CREATE TRIGGER runs_fts_delete AFTER DELETE ON runs BEGIN
+    INSERT INTO runs_fts (runs_fts, rowid, model, exe_path, overrides,
+                          status, message, output)
+    VALUES ('delete', old.id, old.model, old.exe_path, old.overrides,
+            old.status, old.message, old.output);
+END;
+CREATE TRIGGER runs_fts_update AFTER UPDATE ON runs BEGIN
+    INSERT INTO runs_fts (runs_fts, rowid, model, exe_path, overrides,
+                          status, message, output)
+    VALUES ('delete', old.id, old.model, old.exe_path, old.overrides,
+            old.status, old.message, old.output);
+    INSERT INTO runs_fts (rowid, model, exe_path, overrides, status,
+                          message, output)
+    VALUES (new.id, new.model, new.exe_path, new.overrides, new.status,
+            new.message, new.output);
+END;
+INSERT INTO runs_fts (runs_fts) VALUES ('rebuild');
+"""
+
+# Characters of output kept per run for searching.
+OUTPUT_LIMIT = 4096
+# "stopTime>500", "tank1.A<=2": a condition on an override in a search.
+OVERRIDE_CONDITION = re.compile(
+    r"^([A-Za-z_][\w.\[\]]*)(<=|>=|!=|=|<|>)(.+)$")
+
+# Columns the history can be ordered by; each has an index.
+SORT_COLUMNS = ("model", "started", "duration", "status")
+
+# Run states; every run starts as RUNNING and ends in one of the others.
+RUNNING = "running"
+SUCCESS = "success"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMEOUT = "timeout"
+ERROR = "error"
+CACHED = "cached"
+
+
+class RunCatalog:
+    """
+    A SQLite catalog of simulation runs.
+
+    A run is inserted when it is launched and updated when it ends, so the
+    history is structured per run instead of being scraped back out of
+    the application log. The database is opened in WAL mode, so the GUI
+    and headless runs can write to it concurrently.
+    """
+
+    def __init__(self, path=CATALOG_FILE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        columns = {row["name"] for row in
+                   self.connection.execute("PRAGMA table_info(runs)")}
+        if "output" not in columns:
+            self.connection.execute("ALTER TABLE runs ADD COLUMN output TEXT")
+        if not self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'runs_fts'"
+        ).fetchone():
+            # Created once, indexing the runs recorded so far.
+            self.connection.executescript(SEARCH_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get_meta(self, key, default=None):
+        """
+        A value stored with `set_meta`, or `default`.
+        """
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set_meta(self, key, value):
+        """
+        Store a JSON-serializable value under a key, e.g. bookkeeping of
+        the log import.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)))
+
+    def start_run(self, model, exe_path, overrides, output_dir=None,
+                  started=None):
+        """
+        Record the launch of a run.
+
+        :return: The id of the new run.
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (model, exe_path, overrides, started, "
+                "status, output_dir) VALUES (?, ?, ?, ?, ?, ?)",
+                (model, exe_path, json.dumps(overrides),
+                 time.time() if started is None else started, RUNNING,
+                 output_dir))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, status, returncode=None, output_dir=None,
+                   metrics=None, message=None, output=None, finished=None):
+        """
+        Record the end of a run; the duration follows from its start.
+
+        :output: The last lines of the run's output, kept for searching.
+        """
+        finished = time.time() if finished is None else finished
+        with self.connection:
+            self.connection.execute(
+                "UPDATE runs SET finished = ?, duration = ? - started, "
+                "status = ?, returncode = ?, "
+                "output_dir = COALESCE(?, output_dir), metrics = ?, "
+                "message = ?, output = ? WHERE id = ?",
+                (finished, finished, status, returncode, output_dir,
+                 json.dumps(metrics) if metrics else None, message,
+                 output[-OUTPUT_LIMIT:] if output else None, run_id))
+
+    def add_runs(self, runs, meta=None):
+        """
+        Insert finished runs recovered from elsewhere (e.g. the log) in a
+        single transaction, together with meta values recording how far
+        the source was read, so no run is ever added twice.
+
+        :runs: Tuples of (model, exe_path, overrides, started, finished,
+            status, message).
+        :meta: Mapping of meta keys to values stored with the runs.
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO runs (model, exe_path, overrides, started, "
+                "finished, status, message) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(model, exe_path, json.dumps(overrides), started, finished,
+                  status, message)
+                 for model, exe_path, overrides, started, finished, status,
+                 message in runs])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in
+                 (meta or {}).items()])
+
+    def count(self):
+        """
+        The number of runs in the catalog.
+        """
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def runs(self, limit=100, offset=0, order="started", descending=True,
+             text=None, status=None, since=None, until=None):
+        """
+        A page of runs as `sqlite3.Row` objects, by default the most
+        recent first.
+
+        A search is answered from the full-text index. Ordered by start
+        time, its matches are read from the index in id order, newest
+        first, so a page costs the matches on it rather than all matches
+        of a common word; ids follow the start time of every run the
+        launcher records (runs imported from the log later sort as newer
+        than they are).
+
+        :order: The column to order by, one of SORT_COLUMNS.
+        :descending: Order from the largest value down.
+        :text: A search string, see `parse_search`.
+        :status: Only runs with this status.
+        :since: Only runs started at or after this Unix time.
+        :until: Only runs started before this Unix time.
+        """
+        if order not in SORT_COLUMNS:
+            raise ValueError(f"Cannot order runs by '{order}'")
+        direction = "DESC" if descending else "ASC"
+        query, conditions = parse_search(text or "")
+        clauses, parameters = _conditions(conditions)
+        if status:
+            clauses.append("runs.status = ?")
+            parameters.append(status)
+        if since is not None:
+            clauses.append("runs.started >= ?")
+            parameters.append(since)
+        if until is not None:
+            clauses.append("runs.started < ?")
+            parameters.append(until)
+
+        if query and order == "started":
+            where = "".join(f" AND {clause}" for clause in clauses)
+            sql = (f"SELECT runs.* FROM runs_fts CROSS JOIN runs "
+                   f"ON runs.id = runs_fts.rowid WHERE runs_fts MATCH ?{where} "
+                   f"ORDER BY runs_fts.rowid {direction}")
+            parameters.insert(0, query)
+        else:
+            if query:
+                clauses.insert(0, "runs.id IN (SELECT rowid FROM runs_fts "
+                                  "WHERE runs_fts MATCH ?)")
+                parameters.insert(0, query)
+            where = " WHERE " + " AND ".join(clauses) if clauses else ""
+            sql = (f"SELECT * FROM runs{where} "
+                   f"ORDER BY {order} {direction}, id {direction}")
+        return self.connection.execute(
+            f"{sql} LIMIT ? OFFSET ?", parameters + [limit, offset]).fetchall()
+
+
+def parse_search(text):
+    """
+    Split a search string into full-text terms and override conditions.
+
+    Words are matched against the model name, path, overrides, status,
+    message and output of a run; all must match. A word ending in `*`
+    matches as a prefix (slower for short prefixes). Words of the form
+    `name<op>value` (op one of = != < <= > >=), e.g. `stopTime>500`,
+    compare the override `name` of the run instead, numerically if the
+    value is a number.
+
+    :return: (FTS5 query or None, list of (name, op, value)).
+    """
+    terms, conditions = [], []
+    for word in text.split():
+        match = OVERRIDE_CONDITION.match(word)
+        if match:
+            conditions.append(match.groups())
+            continue
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms) or None, conditions
+
+
+def _conditions(conditions):
+    """
+    The SQL clauses and parameters of override conditions.
+    """
+    clauses, parameters = [], []
+    for name, op, value in conditions:
+        path = '$."{}"'.format(name.replace('"', ""))
+        try:
+            parameters.extend([path, float(value)])
+            clauses.append(
+                f"CAST(json_extract(runs.overrides, ?) AS REAL) {op} ?")
+        except ValueError:
+            parameters.extend([path, value])
+            clauses.append(f"json_extract(runs.overrides, ?) {op} ?")
+    return clauses, parameters
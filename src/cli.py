@@ -0,0 +1,360 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+
+from src.cache import ResultCache
+from src.catalog import (
+    CACHED, CANCELLED, FAILED, SUCCESS, TIMEOUT, RunCatalog)
+from src.compare import (
+    DEFAULT_ATOL, DEFAULT_RTOL, SORT_KEYS, compare_files, format_comparison,
+    save_comparison, sort_rows)
+from src.logger import setup_logging
+from src.monitor import OutputMonitor
+from src.profiling import PROFILE_FLAGS, format_report, profile_run
+from src.pyramid import save_pyramid
+from src.regression import run_regression, write_junit
+from src.simulation import (
+    STDERR_FILE, STDOUT_FILE, SimulationAborted, SimulationTimeout,
+    create_scratch_directory, finalize_run, run_model, validate_times)
+from src.stats import format_stats, load_metrics
+from src.sweep import parse_values, run_sweep
+
+
+def _parse_assignments(items, parse=str):
+    """
+    Parse repeated `name=value` command-line arguments into a dict.
+    """
+    result = {}
+    for item in items or ():
+        name, sep, value = item.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Expected name=value, got '{item}'")
+        result[name.strip()] = parse(value)
+    return result
+
+
+def _run_options(args):
+    """
+    Collect the timeout and resource limits given on the command line.
+    """
+    limits = {}
+    if args.cpu_limit:
+        limits["cpu_seconds"] = args.cpu_limit
+    if args.memory_limit:
+        limits["memory_bytes"] = args.memory_limit * 1024 ** 2
+    if args.output_limit:
+        limits["output_bytes"] = args.output_limit * 1024 ** 2
+    return {"timeout": args.timeout, "limits": limits}
+
+
+def _add_limit_arguments(parser):
+    """
+    Add the per-run timeout and resource limit options to a subcommand.
+    """
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="wall-clock limit per run in seconds")
+    parser.add_argument("--cpu-limit", type=int, default=None,
+                        metavar="SECONDS", help="CPU time limit per run")
+    parser.add_argument("--memory-limit", type=int, default=None,
+                        metavar="MB", help="address space limit per run")
+    parser.add_argument("--output-limit", type=int, default=None,
+                        metavar="MB",
+                        help="size of each of stdout.log and stderr.log per "
+                             "run; the middle of longer output is left out")
+
+
+def _record(catalog, method, *args, **kwargs):
+    """
+    Call a run catalog method, logging instead of raising on failure.
+    """
+    if catalog is None:
+        return None
+    try:
+        return getattr(catalog, method)(*args, **kwargs)
+    except sqlite3.Error as e:
+        logging.warning("Could not record the run: %s", e)
+        return None
+
+
+def _open_catalog():
+    try:
+        return RunCatalog()
+    except sqlite3.Error as e:
+        logging.warning("Run catalog unavailable: %s", e)
+        return None
+
+
+def run_command(args):
+    """
+    Run a single simulation, the headless equivalent of the Launch button.
+    """
+    validate_times(args.start, args.stop)
+    if not os.path.isfile(args.exe):
+        raise FileNotFoundError(f"File not found: {args.exe}")
+
+    overrides = {"startTime": args.start, "stopTime": args.stop}
+    overrides.update(_parse_assignments(args.override))
+    logging.info("Selected Model: %s", os.path.basename(args.exe))
+    logging.info("Model Path: %s", args.exe)
+    catalog = _open_catalog()
+    model = os.path.basename(args.exe)
+
+    # Profile runs always execute, since their timings are the point.
+    cache = None if args.no_cache or args.profile else ResultCache()
+    key = result_file = None
+    if cache:
+        key = cache.key(args.exe, overrides)
+        result_file = cache.lookup(key)
+        if result_file:
+            run_id = _record(catalog, "start_run", model, args.exe, overrides,
+                             os.path.dirname(result_file))
+            if run_id is not None:
+                logging.info("Run ID: %s", run_id)
+            logging.info("Status: Simulation skipped, cached result: %s",
+                         result_file)
+            _record(catalog, "finish_run", run_id, CACHED, 0)
+
+    if not result_file:
+        run_dir = create_scratch_directory(args.output)
+        monitor = OutputMonitor(args.start, args.stop)
+        run_id = _record(catalog, "start_run", model, args.exe, overrides,
+                         run_dir)
+        if run_id is not None:
+            logging.info("Run ID: %s", run_id)
+
+        def on_stdout(line):
+            monitor.feed(line)
+            if args.verbose:
+                print(line)
+
+        def on_time(simulated_time):
+            if monitor.advance(simulated_time) and not args.verbose:
+                print(monitor.status_text(), end="\r", file=sys.stderr)
+
+        try:
+            returncode = run_model(
+                args.exe, overrides, run_dir,
+                on_stdout=on_stdout, on_stderr=monitor.feed, on_time=on_time,
+                extra_args=PROFILE_FLAGS if args.profile else (),
+                **_run_options(args))
+        except SimulationAborted as e:
+            _record(catalog, "finish_run", run_id,
+                    TIMEOUT if isinstance(e, SimulationTimeout) else CANCELLED,
+                    message=str(e), output="\n".join(monitor.tail))
+            raise
+        finally:
+            if monitor.progress is not None and not args.verbose:
+                print(file=sys.stderr)
+        if returncode != 0 or not monitor.succeeded:
+            for message in monitor.errors:
+                logging.error("%s", message)
+            logging.error("Status: Simulation failed.")
+            logging.error("Run files kept in %s", run_dir)
+            logging.error("Output: %s; see %s and %s", monitor.summary(),
+                          os.path.join(run_dir, STDOUT_FILE),
+                          os.path.join(run_dir, STDERR_FILE))
+            _record(catalog, "finish_run", run_id, FAILED, returncode,
+                    metrics=load_metrics(run_dir),
+                    message="; ".join(monitor.errors) or None,
+                    output="\n".join(monitor.tail))
+            return 1
+
+        logging.info("Status: Simulation successful.")
+        target_dir = finalize_run(run_dir, args.output, model)
+        logging.info("Output directory: %s", target_dir)
+        logging.info("Output: %s; see %s and %s", monitor.summary(),
+                     os.path.join(target_dir, STDOUT_FILE),
+                     os.path.join(target_dir, STDERR_FILE))
+        metrics = load_metrics(target_dir)
+        _record(catalog, "finish_run", run_id, SUCCESS, returncode,
+                target_dir, metrics, output="\n".join(monitor.tail))
+        for line in format_stats(metrics).splitlines():
+            logging.info("%s", line)
+        if args.profile:
+            report = profile_run(target_dir, args.exe)
+            if report is not None:
+                logging.info("Profile:\n%s", format_report(report))
+        result_file = os.path.join(target_dir, "result.mat")
+        save_pyramid(result_file)
+        if cache:
+            cache.store(key, result_file, args.exe, overrides)
+
+    print(result_file)
+    if args.plot_png:
+        from src.result import save_plot
+        if not save_plot(result_file, args.plot_png, args.variable):
+            return 1
+    return 0
+
+
+def sweep_command(args):
+    """
+    Run a parameter sweep over the grid of all `--param` values.
+    """
+    if not os.path.isfile(args.exe):
+        raise FileNotFoundError(f"File not found: {args.exe}")
+    parameters = _parse_assignments(args.param, parse=parse_values)
+    if not parameters:
+        raise ValueError("At least one --param name=values is required")
+    base_overrides = _parse_assignments(args.override)
+
+    def on_point_done(point):
+        status = "ok" if point["success"] else "FAILED"
+        print(f"[{status}] {point['directory']} {point['overrides']}")
+
+    sweep_dir, points = run_sweep(
+        args.exe,
+        parameters,
+        base_overrides=base_overrides,
+        output_root=args.output,
+        max_workers=args.workers,
+        on_point_done=on_point_done,
+        **_run_options(args),
+    )
+    print(sweep_dir)
+    return 0 if all(point["success"] for point in points) else 1
+
+
+def compare_command(args):
+    """
+    Compare result files against a baseline result file.
+    """
+    comparisons = compare_files(args.baseline, args.results,
+                                atol=args.atol, rtol=args.rtol)
+    for result_file, rows in comparisons.items():
+        comparisons[result_file] = sort_rows(rows, args.sort)
+        print(f"{result_file} vs {args.baseline}:")
+        print(format_comparison(comparisons[result_file], args.limit))
+    if args.json:
+        save_comparison(comparisons, args.json)
+    return 0
+
+
+def regress_command(args):
+    """
+    Re-run the compiled models of a directory against reference results.
+    """
+    def on_case_done(case):
+        print(f"[{case['status']}] {case['name']} ({case['duration']:.1f}s)"
+              + (f": {case['message']}" if case["message"] else ""))
+
+    regression_dir, cases = run_regression(
+        args.models,
+        reference_dir=args.reference,
+        output_root=args.output,
+        max_workers=args.workers,
+        atol=args.atol,
+        rtol=args.rtol,
+        on_case_done=on_case_done,
+        **_run_options(args),
+    )
+    if args.junit:
+        write_junit(cases, args.junit)
+    print(regression_dir)
+    return 0 if all(case["status"] == "passed" for case in cases) else 1
+
+
+def build_parser():
+    """
+    Build the argument parser of the headless launcher.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Headless OpenModelica model launcher.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="run a single simulation")
+    run.add_argument("--exe", required=True, help="model executable")
+    run.add_argument("--start", required=True, help="simulation start time")
+    run.add_argument("--stop", required=True, help="simulation stop time")
+    run.add_argument("--override", action="append", metavar="NAME=VALUE",
+                     help="additional -override value (repeatable)")
+    run.add_argument("--plot-png", metavar="FILE",
+                     help="write the result plot to an image file")
+    run.add_argument("--variable", action="append", metavar="NAME",
+                     help="variable to plot (repeatable, default: all)")
+    run.add_argument("--output", default="output",
+                     help="output directory (default: output)")
+    run.add_argument("--no-cache", action="store_true",
+                     help="always run the model, bypassing the result cache")
+    run.add_argument("--profile", action="store_true",
+                     help="profile run: report the most expensive equations")
+    run.add_argument("-v", "--verbose", action="store_true",
+                     help="echo the model's stdout")
+    _add_limit_arguments(run)
+    run.set_defaults(handler=run_command)
+
+    sweep = subparsers.add_parser("sweep", help="run a parameter sweep")
+    sweep.add_argument("--exe", required=True, help="model executable")
+    sweep.add_argument("--param", action="append", metavar="NAME=VALUES",
+                       help="swept value list 'a,b,c' or range "
+                            "'start:stop:step' (repeatable)")
+    sweep.add_argument("--override", action="append", metavar="NAME=VALUE",
+                       help="fixed -override value for every point")
+    sweep.add_argument("--workers", type=int, default=None,
+                       help="parallel runs (default: number of CPU cores)")
+    sweep.add_argument("--output", default="output",
+                       help="output directory (default: output)")
+    _add_limit_arguments(sweep)
+    sweep.set_defaults(handler=sweep_command)
+
+    compare = subparsers.add_parser(
+        "compare", help="compare results against a baseline result")
+    compare.add_argument("baseline", help="baseline result file")
+    compare.add_argument("results", nargs="+", help="result files to compare")
+    compare.add_argument("--atol", type=float, default=DEFAULT_ATOL,
+                         help="absolute tolerance for the divergence time "
+                              f"(default: {DEFAULT_ATOL})")
+    compare.add_argument("--rtol", type=float, default=DEFAULT_RTOL,
+                         help="relative tolerance for the divergence time "
+                              f"(default: {DEFAULT_RTOL})")
+    compare.add_argument("--sort", choices=SORT_KEYS, default="max_rel",
+                         help="table order, worst first (default: max_rel)")
+    compare.add_argument("--limit", type=int, default=20,
+                         help="number of variables listed (default: 20)")
+    compare.add_argument("--json", metavar="FILE",
+                         help="write every variable's deviations as JSON")
+    compare.set_defaults(handler=compare_command)
+
+    regress = subparsers.add_parser(
+        "regress", help="re-run compiled models against reference results")
+    regress.add_argument("models", help="directory searched for compiled "
+                                        "models (<name>_init.xml + <name>)")
+    regress.add_argument("--reference", metavar="DIR",
+                         help="directory of the <name>_res.mat references "
+                              "(default: next to each executable)")
+    regress.add_argument("--atol", type=float, default=DEFAULT_ATOL,
+                         help=f"absolute tolerance (default: {DEFAULT_ATOL})")
+    regress.add_argument("--rtol", type=float, default=DEFAULT_RTOL,
+                         help=f"relative tolerance (default: {DEFAULT_RTOL})")
+    regress.add_argument("--workers", type=int, default=None,
+                         help="parallel runs (default: number of CPU cores)")
+    regress.add_argument("--output", default="output",
+                         help="output directory (default: output)")
+    regress.add_argument("--junit", metavar="FILE",
+                         help="also write the JUnit XML report to FILE")
+    _add_limit_arguments(regress)
+    regress.set_defaults(handler=regress_command)
+    return parser
+
+
+def main(argv=None):
+    """
+    Entry point of `python -m src`.
+    """
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    try:
+        return args.handler(args)
+    except SimulationAborted as e:
+        logging.error("Status: %s", e)
+        return 1
+    except (ValueError, OSError) as e:
+        logging.error("Status: %s", e)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
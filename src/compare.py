@@ -0,0 +1,160 @@
+import json
+
+import numpy as np
+
+from src.resultfile import open_result
+
+# Default tolerances for the first divergence time: a variable diverges
+# where |other - baseline| > atol + rtol * |baseline|.
+DEFAULT_ATOL = 1e-6
+DEFAULT_RTOL = 1e-3
+# Variables compared per block, bounding memory to a few blocks of
+# (variables x time points) doubles.
+CHUNK_SIZE = 256
+SORT_KEYS = ("max_rel", "max_abs", "rms", "diverges_at", "variable")
+
+
+def common_grid(baseline_time, other_times):
+    """
+    The time grid the runs are compared on: the baseline's time points
+    within the interval covered by every run.
+    """
+    start = max([baseline_time[0]] + [time[0] for time in other_times])
+    stop = min([baseline_time[-1]] + [time[-1] for time in other_times])
+    return baseline_time[(baseline_time >= start) & (baseline_time <= stop)]
+
+
+def interpolation_weights(time, grid):
+    """
+    Linear interpolation of samples at `time` onto `grid`, as the index of
+    the right neighbour and the weight of the right neighbour.
+
+    This is what `np.interp` computes for a single series; precomputing it
+    once lets a whole block of variables sharing the same time points be
+    resampled with two indexed reads and one multiply-add. At duplicated
+    time points (events) the value after the event is taken.
+    """
+    right = np.clip(np.searchsorted(time, grid, side="right"),
+                    1, len(time) - 1)
+    left_time = time[right - 1]
+    span = time[right] - left_time
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(span > 0, (grid - left_time) / span, 1.0)
+    return right, np.clip(weight, 0.0, 1.0)
+
+
+def _resample(values, right, weight):
+    left = values[:, right - 1]
+    return left + weight * (values[:, right] - left)
+
+
+def compare_results(baseline, other, names=None, atol=DEFAULT_ATOL,
+                    rtol=DEFAULT_RTOL):
+    """
+    Compare the trajectories of two results.
+
+    Both results are resampled onto the baseline's time points within
+    their common interval, then for every variable the deviation is
+    summarized:
+      - max_abs: largest absolute difference
+      - max_rel: max_abs relative to the largest baseline magnitude
+      - rms: root mean square of the difference
+      - diverges_at: first time the difference exceeds the tolerance
+        atol + rtol * |baseline|, or None
+
+    :baseline: The reference `ResultFile`.
+    :other: The `ResultFile` compared against it.
+    :names: Variables to compare, by default every trajectory both share.
+    :return: One dict per variable.
+    """
+    if names is None:
+        names = [name for name in baseline.trajectories() if name in other]
+    baseline_time = baseline.time
+    other_time = other.time
+    grid = common_grid(baseline_time, [other_time])
+    if not names or len(grid) == 0:
+        return []
+    base_right, base_weight = interpolation_weights(baseline_time, grid)
+    other_right, other_weight = interpolation_weights(other_time, grid)
+
+    rows = []
+    for first in range(0, len(names), CHUNK_SIZE):
+        block = names[first:first + CHUNK_SIZE]
+        reference = _resample(baseline.matrix(block), base_right, base_weight)
+        difference = np.abs(_resample(other.matrix(block), other_right,
+                                      other_weight) - reference)
+        max_abs = difference.max(axis=1)
+        scale = np.abs(reference).max(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            max_rel = np.where(scale > 0, max_abs / scale,
+                               np.where(max_abs > 0, np.inf, 0.0))
+        rms = np.sqrt(np.mean(difference ** 2, axis=1))
+        diverged = difference > atol + rtol * np.abs(reference)
+        first_index = diverged.argmax(axis=1)
+        any_diverged = diverged[np.arange(len(block)), first_index]
+        for row, name in enumerate(block):
+            rows.append({
+                "variable": name,
+                "max_abs": float(max_abs[row]),
+                "max_rel": float(max_rel[row]),
+                "rms": float(rms[row]),
+                "diverges_at": (float(grid[first_index[row]])
+                                if any_diverged[row] else None),
+            })
+    return rows
+
+
+def compare_files(baseline_file, other_files, **options):
+    """
+    Compare every result file against a baseline result file.
+
+    :options: Passed on to `compare_results`.
+    :return: Mapping of each other file to its comparison rows.
+    """
+    baseline = open_result(baseline_file)
+    if baseline is None:
+        raise ValueError(f"Cannot read {baseline_file}")
+    comparisons = {}
+    for other_file in other_files:
+        other = open_result(other_file)
+        if other is None:
+            raise ValueError(f"Cannot read {other_file}")
+        comparisons[other_file] = compare_results(baseline, other, **options)
+    return comparisons
+
+
+def sort_rows(rows, key="max_rel"):
+    """
+    Order comparison rows worst first; by name for `variable`.
+    """
+    if key == "variable":
+        return sorted(rows, key=lambda row: row["variable"])
+    if key == "diverges_at":
+        # Earliest divergence first, variables that never diverge last.
+        return sorted(rows, key=lambda row: (row["diverges_at"] is None,
+                                             row["diverges_at"] or 0.0))
+    return sorted(rows, key=lambda row: row[key], reverse=True)
+
+
+def format_comparison(rows, limit=20):
+    """
+    Format comparison rows as a text table.
+    """
+    lines = [f"{'max abs':>11} {'max rel':>11} {'rms':>11} "
+             f"{'diverges at':>12}  variable"]
+    for row in rows[:limit]:
+        diverges = ("-" if row["diverges_at"] is None
+                    else f"{row['diverges_at']:.6g}")
+        lines.append(f"{row['max_abs']:>11.4g} {row['max_rel']:>11.4g} "
+                     f"{row['rms']:>11.4g} {diverges:>12}  {row['variable']}")
+    if not rows:
+        lines.append("(no shared variables over a common time interval)")
+    return "\n".join(lines)
+
+
+def save_comparison(comparisons, path):
+    """
+    Store the comparison rows of every compared file as JSON.
+    """
+    with open(path, "w") as f:
+        json.dump(comparisons, f, indent=2)
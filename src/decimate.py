@@ -0,0 +1,148 @@
+import numpy as np
+
+# Points drawn per horizontal pixel of the axes. Two keep both the
+# minimum and the maximum of every pixel column.
+POINTS_PER_PIXEL = 2
+
+
+def minmax_decimate(time, values, max_points):
+    """
+    Reduce a trajectory to at most about `max_points` points for drawing.
+
+    The samples are split into `max_points / 2` buckets of equal length
+    and each bucket is replaced by its minimum and maximum, in the order
+    they occur. Peaks, spikes and the envelope survive exactly, so the
+    plot at screen resolution looks like the full data, while the cost of
+    drawing no longer depends on the number of samples. The first and
+    last sample are always kept so the line spans the full time range.
+
+    :time: Sorted time points.
+    :values: Values aligned with `time`.
+    :max_points: Target number of points, typically twice the pixel width.
+    :return: (time, values), unchanged if already small enough.
+    """
+    n = len(time)
+    buckets = max(int(max_points) // 2, 1)
+    if n <= max(max_points, 4):
+        return time, values
+
+    # Equal-sized buckets over the inner samples, as a 2-D view, so the
+    # extrema of all buckets are found in a single vectorized pass. The
+    # few samples that do not fill a bucket are merged into the last one
+    # through its min/max.
+    inner = values[1:-1]
+    size = len(inner) // buckets
+    body = inner[:size * buckets].reshape(buckets, size)
+    low = body.argmin(axis=1)
+    high = body.argmax(axis=1)
+    rest = inner[size * buckets:]
+    if len(rest):
+        tail = np.concatenate((body[-1], rest))
+        low[-1] = tail.argmin()
+        high[-1] = tail.argmax()
+    offsets = np.arange(buckets) * size
+
+    # Keep every bucket's two extrema in time order.
+    picks = np.sort(np.stack((low + offsets, high + offsets), axis=1),
+                    axis=1).ravel() + 1
+    index = np.concatenate(([0], picks, [n - 1]))
+    return time[index], values[index]
+
+
+def visible_window(time, xmin, xmax):
+    """
+    Index range of the samples needed to draw the time window
+    [xmin, xmax], including one sample on each side so the line runs to
+    the edges of the axes.
+
+    :return: (start, stop) slice bounds into `time`.
+    """
+    start = max(int(np.searchsorted(time, xmin, side="left")) - 1, 0)
+    stop = min(int(np.searchsorted(time, xmax, side="right")) + 1, len(time))
+    return start, stop
+
+
+class MinMaxStream:
+    """
+    Min/max decimation of trajectories that grow at the end, as those of
+    a running simulation.
+
+    New samples are gathered into buckets of a fixed number of samples,
+    each keeping its minimum and maximum and the times of its first and
+    last sample. Once there are more than twice `buckets` buckets,
+    neighbours are merged and the bucket size doubles, so every block of
+    samples is processed once, at a cost proportional to its length, and
+    the points drawn stay bounded however long the run.
+    """
+
+    def __init__(self, rows, buckets):
+        """
+        :rows: Number of trajectories, all sharing the same time points.
+        :buckets: Minimum number of buckets kept once the trajectories
+            are long enough.
+        """
+        self.buckets = buckets
+        self.size = 1
+        self._start = np.empty(0)
+        self._end = np.empty(0)
+        self._min = np.empty((rows, 0))
+        self._max = np.empty((rows, 0))
+        # Samples not yet filling a bucket.
+        self._time = np.empty(0)
+        self._values = np.empty((rows, 0))
+
+    def __len__(self):
+        """
+        Number of points `points` returns per trajectory.
+        """
+        return 2 * len(self._start) + len(self._time)
+
+    def extend(self, time, values):
+        """
+        Append samples.
+
+        :time: The new time points, after all earlier ones.
+        :values: Array with a row of new values per trajectory.
+        """
+        time = np.concatenate((self._time, time))
+        values = np.concatenate((self._values, values), axis=1)
+        size = self.size
+        full = len(time) // size * size
+        if full:
+            body = values[:, :full].reshape(len(values), -1, size)
+            self._min = np.concatenate((self._min, body.min(axis=2)), axis=1)
+            self._max = np.concatenate((self._max, body.max(axis=2)), axis=1)
+            self._start = np.concatenate((self._start, time[:full:size]))
+            self._end = np.concatenate(
+                (self._end, time[size - 1:full:size]))
+        self._time, self._values = time[full:], values[:, full:]
+        while len(self._start) > 2 * self.buckets:
+            self._merge()
+
+    def _merge(self):
+        # An odd last bucket is kept as it is and merged with a later one.
+        even = len(self._start) // 2 * 2
+        self._min = np.concatenate((np.minimum(
+            self._min[:, 0:even:2], self._min[:, 1:even:2]),
+            self._min[:, even:]), axis=1)
+        self._max = np.concatenate((np.maximum(
+            self._max[:, 0:even:2], self._max[:, 1:even:2]),
+            self._max[:, even:]), axis=1)
+        self._start = np.concatenate((self._start[0:even:2],
+                                      self._start[even:]))
+        self._end = np.concatenate((self._end[1:even:2], self._end[even:]))
+        self.size *= 2
+
+    def points(self, row):
+        """
+        The points to draw for a trajectory: the minimum and maximum of
+        every bucket at its centre time, followed by the samples of the
+        bucket still being filled.
+
+        :return: (time, values)
+        """
+        centre = (self._start + self._end) / 2
+        return (np.concatenate((np.repeat(centre, 2), self._time)),
+                np.concatenate((np.stack(
+                    (self._min[row], self._max[row]), axis=1).ravel(),
+                    self._values[row])))
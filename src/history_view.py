@@ -0,0 +1,134 @@
+import json
+import logging
+import sqlite3
+import time
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+# (header, catalog column) of every column of the history table.
+COLUMNS = (
+    ("Model", "model"),
+    ("Started", "started"),
+    ("Duration", "duration"),
+    ("Status", "status"),
+)
+# Rows fetched from the catalog per fetchMore call.
+BATCH_SIZE = 200
+
+
+class RunHistoryModel(QAbstractTableModel):
+    """
+    A table model over the run catalog for the history page.
+
+    Rows are fetched from the catalog in batches as the view scrolls
+    (`canFetchMore`/`fetchMore`), so opening the page costs one page of
+    rows however many runs are recorded or match the filters: a batch
+    asks for one row more than it keeps to learn whether another follows.
+    Sorting and filtering are done by the database on its indexes, after
+    which the rows are fetched again.
+    """
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.order = "started"
+        self.descending = True
+        # Keyword arguments of `RunCatalog.runs` selecting the rows.
+        self.filters = {}
+        self._rows = []
+        self._more = False
+
+    def set_filters(self, **filters):
+        """
+        Show only the runs matching the filters, see `RunCatalog.runs`.
+        """
+        self.filters = filters
+        self.refresh()
+
+    def refresh(self):
+        """
+        Drop the fetched rows and start again from the first batch.
+        """
+        self.beginResetModel()
+        self._rows = []
+        self._more = self.catalog is not None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        try:
+            rows = self.catalog.runs(limit=BATCH_SIZE + 1,
+                                     offset=len(self._rows), order=self.order,
+                                     descending=self.descending,
+                                     **self.filters)
+        except sqlite3.Error as e:
+            logging.warning("Could not read the run catalog: %s", e)
+            rows = []
+        self._more = len(rows) > BATCH_SIZE
+        rows = rows[:BATCH_SIZE]
+        if not rows:
+            return
+        self.beginInsertRows(QModelIndex(), len(self._rows),
+                             len(self._rows) + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.order = COLUMNS[column][1]
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.refresh()
+
+    def headerData(self, section, orientation,
+                   role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole):
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        run = self._rows[index.row()]
+        column = COLUMNS[index.column()][1]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display(run, column)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self._details(run)
+        if (role == Qt.ItemDataRole.TextAlignmentRole
+                and column == "duration"):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    @staticmethod
+    def _display(run, column):
+        value = run[column]
+        if column == "started":
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value))
+        if column == "duration":
+            return "-" if value is None else f"{value:.1f}s"
+        if column == "status":
+            return value.capitalize()
+        return value
+
+    @staticmethod
+    def _details(run):
+        lines = [f"Model Path: {run['exe_path']}"]
+        overrides = json.loads(run["overrides"] or "{}")
+        if overrides:
+            lines.append("Overrides: " + ", ".join(
+                f"{name}={value}" for name, value in overrides.items()))
+        if run["output_dir"]:
+            lines.append(f"Output: {run['output_dir']}")
+        if run["message"]:
+            lines.append(f"Message: {run['message']}")
+        return "\n".join(lines)
@@ -1,31 +1,245 @@
+import atexit
+import gzip
 import logging
 import os
+import queue
+import shutil
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+LOG_FILE = "logs/OPLauncher.log"
+# The log is rotated once it exceeds LOG_MAX_BYTES; LOG_BACKUP_COUNT
+# rotated segments are kept, all but the newest gzip-compressed.
+LOG_MAX_BYTES = 10 * 1024 ** 2
+LOG_BACKUP_COUNT = 5
+# Records waiting for the writer thread; beyond this they are dropped
+# rather than blocking the thread that logs them.
+LOG_QUEUE_SIZE = 10000
 
-def setup_logging(log_file="logs/OPLauncher.log"):
+_listeners = []
+_handlers = []
+_worker_queue = None
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    A queue handler that never blocks: a record that does not fit in the
+    queue is dropped, and the number dropped is logged with the next
+    record that fits.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": f"{self.dropped} log records dropped, "
+                           "the log queue was full"}))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _LogListener(QueueListener):
+    """
+    A queue listener that waits for room in a full queue to stop, so the
+    records queued before it are still written.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+def log_segments(log_file=LOG_FILE):
+    """
+    The rotated segments of a log file, oldest first, followed by the log
+    file itself; see `RotatingLogHandler`. Missing files are skipped.
+    """
+    numbered = []
+    prefix = os.path.basename(log_file) + "."
+    directory = os.path.dirname(log_file)
+    try:
+        names = os.listdir(directory or ".")
+    except FileNotFoundError:
+        return []
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        number = name[len(prefix):]
+        if number.endswith(".gz"):
+            number = number[:-len(".gz")]
+        if number.isdigit():
+            numbered.append((int(number), os.path.join(directory, name)))
+    segments = [path for _, path in sorted(numbered, reverse=True)]
+    if os.path.exists(log_file):
+        segments.append(log_file)
+    return segments
+
+
+def open_log_segment(path):
+    """
+    Open a log file or rotated segment for reading as bytes, decompressing
+    it if needed.
+    """
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+class RotatingLogHandler(RotatingFileHandler):
+    """
+    A size-bounded log file: past `maxBytes` it is renamed to `<log>.1`,
+    the previous `<log>.1` is gzip-compressed to `<log>.2.gz`, older
+    segments move up by one and the one beyond `backupCount` is deleted.
+
+    Every log file starts with a line naming it by a unique id, which
+    tells the segments apart however they were renamed or compressed. The
+    newest segment stays uncompressed, so a reader that was following the
+    log can finish it cheaply. When another
+    process sharing the log rotated it, the handler reopens the new file
+    instead of writing on into the rotated one.
+    """
+
+    def _open(self):
+        stream = super()._open()
+        if stream.tell() == 0:
+            stream.write(self.format(logging.makeLogRecord({
+                "levelno": logging.INFO, "levelname": "INFO",
+                "msg": f"Log file {uuid.uuid4().hex}"})) + self.terminator)
+        return stream
+
+    def emit(self, record):
+        if self.stream is not None:
+            try:
+                rotated = (os.stat(self.baseFilename).st_ino
+                           != os.fstat(self.stream.fileno()).st_ino)
+            except FileNotFoundError:
+                rotated = True
+            if rotated:
+                self.stream.close()
+                self.stream = None
+        super().emit(record)
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        first = f"{self.baseFilename}.1"
+        for number in range(self.backupCount - 1, 1, -1):
+            source = f"{self.baseFilename}.{number}.gz"
+            if os.path.exists(source):
+                os.replace(source, f"{self.baseFilename}.{number + 1}.gz")
+        if os.path.exists(first) and self.backupCount > 1:
+            _compress(first, f"{self.baseFilename}.2.gz")
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, first)
+        if not self.delay:
+            self.stream = self._open()
+
+
+def _compress(source, target):
+    # Written under a temporary name first, so readers never see a
+    # partial segment.
+    with open(source, "rb") as f_in:
+        with gzip.open(target + ".tmp", "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.replace(target + ".tmp", target)
+    os.remove(source)
+
+
+def setup_logging(log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES,
+                  backup_count=LOG_BACKUP_COUNT):
     """
     Configure the logging system.
 
     Logging is written to both a log file and the console. The logging level is
     set to DEBUG to capture detailed messages for debugging and analysis.
 
+    Logging calls only put the record on a bounded queue; a background
+    thread writes it to the file and console, so no thread (in particular
+    the GUI thread) waits for disk or terminal I/O. The queue is flushed
+    when the interpreter exits.
+
+    :max_bytes: Size at which the log file is rotated; 0 never rotates.
+    :backup_count: Number of rotated segments kept (at least one), see
+        `RotatingLogHandler`.
     """
+    if _listeners:
+        return
     # Ensure the directory for the log file exists
     log_dir = os.path.dirname(log_file)
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
 
-    logging.basicConfig(
-        level=logging.DEBUG,  # Capture all log levels (DEBUG, INFO, etc.)
-        format="%(asctime)s - %(levelname)s - %(message)s",  # Log format
-        datefmt="%Y-%m-%d %H:%M:%S",  # Timestamp format
-        handlers=[
-            logging.FileHandler(log_file),  # Write logs to the specified file
-            logging.StreamHandler()  # Also output logs to the console
-        ]
-    )
+    formatter = logging.Formatter(
+        "%(asctime)s - %(levelname)s - %(message)s",  # Log format
+        datefmt="%Y-%m-%d %H:%M:%S")  # Timestamp format
+    _handlers[:] = [
+        # Write logs to the specified file
+        RotatingLogHandler(log_file, maxBytes=max_bytes,
+                           backupCount=max(backup_count, 1), delay=True),
+        logging.StreamHandler()  # Also output logs to the console
+    ]
+    for handler in _handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _start_listener(log_queue)
+    atexit.register(_stop_listeners)
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)  # Capture all log levels (DEBUG, INFO, etc.)
+    root.addHandler(_DroppingQueueHandler(log_queue))
     logging.getLogger('matplotlib').setLevel(logging.WARNING)
     logging.getLogger('scipy').setLevel(logging.ERROR)
     logging.info(
         "Logging system initialized. Writing logs to '%s'", log_file
     )
+
+
+def worker_log_queue():
+    """
+    A multiprocessing queue whose records are written to the log of this
+    process, for worker processes to log through (see
+    `setup_worker_logging`), e.g.
+
+        ProcessPoolExecutor(initializer=setup_worker_logging,
+                            initargs=(worker_log_queue(),))
+
+    It is created on first use, after `setup_logging`.
+    """
+    global _worker_queue
+    if _worker_queue is None:
+        import multiprocessing
+        _worker_queue = multiprocessing.Queue(LOG_QUEUE_SIZE)
+        _start_listener(_worker_queue)
+    return _worker_queue
+
+
+def setup_worker_logging(log_queue):
+    """
+    Configure the logging system of a worker process: every record is
+    forwarded through `log_queue` (from `worker_log_queue`) to the log of
+    the parent process.
+    """
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.setLevel(logging.DEBUG)
+    root.addHandler(_DroppingQueueHandler(log_queue))
+
+
+def _start_listener(log_queue):
+    listener = _LogListener(log_queue, *_handlers,
+                            respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def _stop_listeners():
+    # Write out what is still queued; runs before logging's own shutdown
+    # closes the handlers.
+    while _listeners:
+        _listeners.pop().stop()
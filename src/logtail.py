@@ -0,0 +1,185 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+
+from src.catalog import CACHED, CANCELLED, FAILED, SUCCESS, TIMEOUT
+from src.logger import LOG_FILE, log_segments, open_log_segment
+
+# "2025-01-23 22:18:24 - INFO - Status: Simulation successful."
+RECORD = re.compile(
+    r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) - \w+ - (Selected Model|Model Path"
+    r"|Status|Run ID):\s*(.*?)\s*$")
+META_KEY = "log_tail"
+# Bytes read from the log per chunk.
+CHUNK_SIZE = 1 << 20
+
+
+def _legacy_status(text):
+    """
+    Map the text of a logged `Status:` line onto a run status.
+    """
+    text = text.lower()
+    if "successful" in text:
+        return SUCCESS
+    if "cached" in text:
+        return CACHED
+    if "cancel" in text:
+        return CANCELLED
+    if "timeout" in text:
+        return TIMEOUT
+    return FAILED
+
+
+class LogTailer:
+    """
+    Incrementally imports the runs recorded only in the application log
+    into the run catalog.
+
+    Runs launched before the catalog existed (or by older launchers that
+    share the log) exist only as "Selected Model:", "Model Path:" and
+    "Status:" lines. Each call of `update` reads just the bytes appended
+    since the previous call: the position reached (the byte offset and
+    the first line of the log file it is in) and the parser state are
+    kept in the catalog's meta table, so the log is never read from the
+    start again.
+
+    The log is read across its rotated segments (see `log_segments`),
+    compressed or not. When the log was rotated since the last update,
+    the segment that was being read is found again by its first line,
+    which names it by a unique id (see `RotatingLogHandler`); its rest and
+    every newer segment are read in turn. If it has been deleted
+    meanwhile, all remaining segments are read. A log file shorter than
+    the offset was truncated and is read again from the start.
+
+    Runs that are in the catalog already log a "Run ID:" line; the status
+    lines that follow it up to the next model selection are skipped.
+    """
+
+    def __init__(self, catalog, log_file=LOG_FILE):
+        self.catalog = catalog
+        self.log_file = log_file
+
+    def update(self):
+        """
+        Import the runs appended to the log since the last update.
+
+        :return: The number of runs imported.
+        """
+        try:
+            return self._update()
+        except (OSError, EOFError, sqlite3.Error) as e:
+            logging.warning("Could not import the log history: %s", e)
+            return 0
+
+    def _update(self):
+        segments = log_segments(self.log_file)
+        if not segments:
+            return 0
+        state = self.catalog.get_meta(META_KEY) or {"offset": 0}
+        first = self._locate(segments, state)
+        if first is None and state.get("head") is not None and (
+                segments[-1] == self.log_file
+                and os.stat(self.log_file).st_ino == state.get("inode")):
+            # The log file lost its first line: truncated in place.
+            first = len(segments) - 1
+            state["offset"] = 0
+        elif first is None:
+            if "head" in state or "inode" in state:
+                logging.warning("Log segments were deleted before being "
+                                "imported; runs in them are missing from "
+                                "the history")
+            first = 0
+            state = {"offset": 0}
+        imported = 0
+        for index in range(first, len(segments)):
+            path = segments[index]
+            head = self._head(path)
+            if head is None:
+                # Nothing complete to read yet; stay in the previous one.
+                break
+            if index > first or (path == self.log_file
+                                 and os.path.getsize(path) < state["offset"]):
+                # A newer segment, or the log file truncated in place.
+                state["offset"] = 0
+            state.update(head=head, inode=os.stat(path).st_ino)
+            imported += self._read(path, state)
+        return imported
+
+    def _locate(self, segments, state):
+        """
+        The index of the segment the state's position is in, or None.
+        """
+        head, inode = state.get("head"), state.get("inode")
+        for index in reversed(range(len(segments))):
+            path = segments[index]
+            if head is not None:
+                if self._head(path) == head:
+                    return index
+            elif inode is not None and not path.endswith(".gz"):
+                # Position saved before segments had ids; the log file it
+                # was in is the uncompressed segment.
+                if os.stat(path).st_ino == inode:
+                    return index
+        return None
+
+    @staticmethod
+    def _head(path):
+        """
+        The first line of a log file, or None while it has no complete
+        line.
+        """
+        with open_log_segment(path) as f:
+            line = f.readline(4096)
+        if not line.endswith(b"\n"):
+            return None
+        return line.decode("utf-8", "replace")
+
+    def _read(self, path, state):
+        """
+        Import the runs in a log file from the offset in `state` on.
+        """
+        imported = 0
+        with open_log_segment(path) as f:
+            f.seek(state["offset"])
+            pending = b""
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                lines = (pending + chunk).split(b"\n")
+                # Keep a trailing partial line for the next chunk (or the
+                # next update, if the writer is in the middle of it).
+                pending = lines.pop()
+                runs = []
+                for line in lines:
+                    run = self._parse(state, line.decode("utf-8", "replace"))
+                    if run is not None:
+                        runs.append(run)
+                state["offset"] = f.tell() - len(pending)
+                # The runs and the offset after them are stored together.
+                self.catalog.add_runs(runs, {META_KEY: state})
+                imported += len(runs)
+        return imported
+
+    @staticmethod
+    def _parse(state, line):
+        """
+        Advance the parser state by one log line.
+
+        :return: The run a legacy `Status:` line describes, or None.
+        """
+        match = RECORD.match(line)
+        if match is None:
+            return None
+        timestamp, field, value = match.groups()
+        if field == "Selected Model":
+            state.update(model=value, exe_path="", cataloged=False)
+        elif field == "Model Path":
+            state["exe_path"] = value
+        elif field == "Run ID":
+            state["cataloged"] = True
+        elif not state.get("cataloged"):
+            started = time.mktime(time.strptime(timestamp,
+                                                "%Y-%m-%d %H:%M:%S"))
+            return (state.get("model") or "", state.get("exe_path") or "",
+                    {}, started, started, _legacy_status(value), value)
+        return None
@@ -0,0 +1,122 @@
+import re
+import time
+from collections import deque
+
+# OpenModelica runtime messages look like
+#   "LOG_SUCCESS       | info    | The simulation finished successfully."
+LOG_LINE = re.compile(r"^\s*(LOG_\w+)\s*\|\s*(\w+)\s*\|\s?(.*)$")
+
+
+class OutputMonitor:
+    """
+    An incremental parser for the stdout of a model executable.
+
+    Lines are fed one at a time as they arrive. Only counters and a
+    bounded tail of the output are kept, so memory use does not depend on
+    how verbose the run is.
+
+    The runtime does not print the simulated time at the log levels
+    used (see `src.simulation.STATS_FLAG`); it is passed to `advance`
+    instead, as read from the result file while it is written (see the
+    `on_time` callback of `run_model`).
+    """
+
+    def __init__(self, start_time=None, stop_time=None, tail_lines=200):
+        """
+        :start_time: Simulation start time, used for the progress estimate.
+        :stop_time: Simulation stop time, used for the progress estimate.
+        :tail_lines: Number of trailing output lines to keep.
+        """
+        self.start_time = float(start_time) if start_time is not None else None
+        self.stop_time = float(stop_time) if stop_time is not None else None
+        self.tail = deque(maxlen=tail_lines)
+        self.line_count = 0
+        self.success = False
+        self.failed = False
+        self.warnings = 0
+        self.errors = deque(maxlen=20)
+        self.simulated_time = None
+        self.started = time.monotonic()
+
+    def feed(self, line):
+        """
+        Process one line of output.
+        """
+        self.line_count += 1
+        self.tail.append(line)
+
+        match = LOG_LINE.match(line)
+        if match:
+            stream, kind, message = match.groups()
+            kind = kind.lower()
+            if stream == "LOG_SUCCESS":
+                self.success = True
+            elif kind in ("error", "assert") or stream == "LOG_ASSERT":
+                self.failed = True
+                self.errors.append(message.strip())
+            elif kind == "warning":
+                self.warnings += 1
+        elif "LOG_SUCCESS" in line:
+            self.success = True
+
+    def advance(self, simulated_time):
+        """
+        Record the simulated time reached by the run.
+
+        :return: True if it is later than the time recorded before.
+        """
+        if self.simulated_time is None or simulated_time > self.simulated_time:
+            self.simulated_time = simulated_time
+            return True
+        return False
+
+    def summary(self):
+        """
+        A one-line account of the output for the application log.
+        """
+        text = f"{self.line_count} lines, {self.warnings} warnings"
+        if self.errors:
+            text += f", last error: {self.errors[-1]}"
+        return text
+
+    @property
+    def succeeded(self):
+        """
+        True if the runtime reported success and no error was seen.
+        """
+        return self.success and not self.failed
+
+    @property
+    def progress(self):
+        """
+        Fraction of the simulated interval completed, or None if unknown.
+        """
+        if (self.simulated_time is None or self.start_time is None
+                or self.stop_time is None or self.stop_time <= self.start_time):
+            return None
+        fraction = ((self.simulated_time - self.start_time)
+                    / (self.stop_time - self.start_time))
+        return min(max(fraction, 0.0), 1.0)
+
+    def eta(self):
+        """
+        Estimated remaining wall-clock seconds, or None if unknown.
+        """
+        progress = self.progress
+        if not progress:
+            return None
+        elapsed = time.monotonic() - self.started
+        return elapsed * (1.0 - progress) / progress
+
+    def status_text(self):
+        """
+        A short human-readable progress summary for the status bar.
+        """
+        progress = self.progress
+        if progress is None:
+            return "Running Subprocess..."
+        text = f"Simulating... {progress:.0%}"
+        eta = self.eta()
+        if eta is not None and progress < 1.0:
+            text += f" (ETA {eta:.0f}s)"
+        return text
@@ -0,0 +1,203 @@
+import os
+
+from matplotlib.backends.backend_qtagg import (
+    FigureCanvasQTAgg, NavigationToolbar2QT)
+from matplotlib.figure import Figure
+from PyQt6.QtWidgets import QComboBox, QVBoxLayout, QWidget
+
+from src.decimate import (
+    POINTS_PER_PIXEL, minmax_decimate, visible_window)
+from src.pyramid import Pyramid
+from src.result import load_result, split_variables
+
+# Number of runs offered in the run selector.
+MAX_RUNS = 50
+AXES_TITLES = ("Variables", "Derivatives")
+
+
+class PlotPanel(QWidget):
+    """
+    A plot page embedded in the main window.
+
+    One figure with two axes lives for the whole session. Showing a result
+    updates the existing line artists in place (adding or removing lines
+    only when the set of variables changes), so switching between runs is
+    a redraw rather than a new figure, and memory stays flat however many
+    runs are shown.
+
+    Lines are drawn from a min/max decimation of the trajectories to the
+    pixel width of the axes. Whenever the visible time window changes
+    (zoom, pan, resize) the lines are decimated again for that window, so
+    zooming in reveals every sample. If the run has a pyramid sidecar, wide
+    windows are drawn from it and only narrow ones read the samples.
+
+    The trajectories of a running simulation are shown with `show_live`,
+    called again whenever new time points have been read.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.figure = Figure(figsize=(5, 4), tight_layout=True)
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        self.axes = self.figure.subplots(2, 1, sharex=True)
+        for ax, title in zip(self.axes, AXES_TITLES):
+            ax.set_title(title, fontsize="small")
+            ax.grid()
+        self.axes[-1].set_xlabel("time [s]")
+        self._lines = [{} for _ in self.axes]
+        self._result = None
+        self._time = None
+        self._pyramid = None
+        # Set while `_draw` swaps the result, when the lines of the other
+        # axes still belong to the previous one.
+        self._drawing = False
+        for ax in self.axes:
+            ax.callbacks.connect("xlim_changed", self._redecimate)
+        self.canvas.mpl_connect("resize_event", self._on_resize)
+
+        self.run_selector = QComboBox(self)
+        self.run_selector.setStyleSheet("font:  9pt \"Montserrat\";")
+        self.run_selector.currentIndexChanged.connect(self._on_run_selected)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.addWidget(self.run_selector)
+        layout.addWidget(self.canvas)
+        layout.addWidget(NavigationToolbar2QT(self.canvas, self))
+
+    def add_run(self, result_file, label=None):
+        """
+        Add a result file to the run selector and show it.
+        """
+        label = label or os.path.basename(os.path.dirname(result_file))
+        index = self.run_selector.findData(result_file)
+        if index < 0:
+            self.run_selector.insertItem(0, label, result_file)
+            while self.run_selector.count() > MAX_RUNS:
+                self.run_selector.removeItem(self.run_selector.count() - 1)
+            index = 0
+        if index == self.run_selector.currentIndex():
+            self.show_result(result_file)
+        else:
+            self.run_selector.setCurrentIndex(index)
+
+    def _on_run_selected(self, index):
+        result_file = self.run_selector.itemData(index)
+        if result_file:
+            self.show_result(result_file)
+
+    def show_result(self, result_file, variables=None):
+        """
+        Show a result file, reusing the lines already on the axes.
+
+        :return: False if the file could not be read.
+        """
+        result = load_result(result_file)
+        if result is None:
+            return False
+        for ax in self.axes:
+            ax.set_autoscale_on(True)
+        self._result = result
+        self._time = None
+        self._pyramid = Pyramid.open(result_file)
+        span = result.time_span() or (0.0, 1.0)
+        self._draw(split_variables(result, variables),
+                   lambda ax, name, window: self._decimate(
+                       ax, name, window or span))
+        return True
+
+    def show_live(self, variables, points, restart=False):
+        """
+        Show the trajectories of a running simulation.
+
+        The points are prepared off the GUI thread (see `MinMaxStream`),
+        so an update only hands them to the lines. They are not decimated
+        again when zooming; the full resolution is shown once the run
+        ends. The axes follow the growing trajectories unless the user
+        zoomed or panned, which keeps the chosen window until the next
+        run.
+
+        :variables: The names shown on each axes, see `split_variables`.
+        :points: Mapping of every name to the (time, values) to draw.
+        :restart: True for the first update of a run, to reset the view.
+        """
+        if restart:
+            for ax in self.axes:
+                ax.set_autoscale_on(True)
+        self._result = self._time = self._pyramid = None
+        self._draw(variables, lambda ax, name, window: points[name])
+
+    def _draw(self, variables, points):
+        """
+        Update the lines of both axes.
+
+        :variables: The names shown on each axes.
+        :points: Function of (axes, name, time window) returning the
+            (time, values) to draw; the window is None while the axes
+            follow the data.
+        """
+        self._drawing = True
+        try:
+            self._update_lines(variables, points)
+        finally:
+            self._drawing = False
+        self.canvas.draw_idle()
+
+    def _update_lines(self, variables, points):
+        for ax, lines, names in zip(self.axes, self._lines, variables):
+            for name in list(lines):
+                if name not in names:
+                    lines.pop(name).remove()
+            window = None if ax.get_autoscalex_on() else sorted(ax.get_xlim())
+            for name in names:
+                data = points(ax, name, window)
+                if name in lines:
+                    lines[name].set_data(*data)
+                else:
+                    lines[name], = ax.plot(*data, label=name)
+            if lines:
+                ax.legend(fontsize="x-small", loc="upper right")
+            elif ax.get_legend() is not None:
+                ax.get_legend().remove()
+            ax.relim()
+            ax.autoscale_view()
+
+    def _decimate(self, ax, name, window):
+        """
+        The points of a variable to draw for a time window on an axes:
+        its pyramid envelope if there is one at this zoom level, otherwise
+        a decimation of the samples inside the window.
+        """
+        pixels = max(int(ax.bbox.width), 1)
+        if self._pyramid is not None:
+            data = self._pyramid.window(name, *window, pixels)
+            if data is not None:
+                return data
+            start, stop = self._pyramid.locate(*window)
+        else:
+            # Without a pyramid the result is short; its time points are
+            # read once, on first use.
+            if self._time is None:
+                self._time = self._result.time
+            start, stop = visible_window(self._time, *window)
+        time, values = self._result.trajectory(name, start, stop)
+        return minmax_decimate(time, values, POINTS_PER_PIXEL * pixels)
+
+    def _redecimate(self, ax):
+        """
+        Redraw the lines of an axes after its visible time window
+        changed.
+        """
+        if self._drawing or self._result is None:
+            # `_draw` decimates every line for the new limits itself.
+            return
+        index = list(self.axes).index(ax)
+        window = sorted(ax.get_xlim())
+        for name, line in self._lines[index].items():
+            if name in self._result:
+                line.set_data(*self._decimate(ax, name, window))
+        self.canvas.draw_idle()
+
+    def _on_resize(self, event):
+        for ax in self.axes:
+            self._redecimate(ax)
@@ -0,0 +1,196 @@
+import glob
+import json
+import logging
+import os
+
+# Runtime flags of a profile run. The profiling data itself is only
+# written by models compiled with profiling enabled
+# (e.g. `--profiling=blocks+html`); `-clock=RT` selects the wall clock
+# for the measured block and function times.
+PROFILE_FLAGS = ("-clock=RT",)
+PROFILE_FILE = "profile.json"
+
+
+def find_profile_files(run_dir):
+    """
+    Locate the `*_prof.intdata` / `*_prof.realdata` pair of a run.
+
+    :return: (intdata, realdata, prof_json) paths; prof_json may be None.
+        None if the run did not produce profiling data.
+    """
+    for intdata in glob.glob(os.path.join(run_dir, "*_prof.intdata")):
+        prefix = intdata[:-len(".intdata")]
+        realdata = prefix + ".realdata"
+        if os.path.isfile(realdata):
+            prof_json = prefix + ".json"
+            return (intdata, realdata,
+                    prof_json if os.path.isfile(prof_json) else None)
+    return None
+
+
+def _equation_label(equation):
+    """
+    A short human-readable description of an `_info.json` equation.
+    """
+    tag = equation.get("tag", "")
+    defines = ", ".join(equation.get("defines", ()))
+    text = " ".join(str(part) for part in equation.get("equation", ()))
+    label = f"{tag} {defines}".strip()
+    if text:
+        label += f": {text}"
+    return label[:120]
+
+
+def decode_profile(intdata, realdata, n_functions=0):
+    """
+    Decode the per-step profiling files written by the runtime.
+
+    Each step appends one row to both files:
+      - intdata (uint32): step number, then the call count of every
+        function and profile block during the step
+      - realdata (float64): simulated time, time spent in the step, then
+        the time of every function and profile block during the step
+
+    The number of measured entries is not stored, but it follows from the
+    file sizes: with R rows and k entries the files hold R*(1+k) ints and
+    R*(2+k) doubles, so R is their difference.
+
+    :return: dict with `steps`, `functions` and `blocks`, the last two
+        holding per-entry total calls, total time and max step time.
+    """
+    import numpy as np
+
+    ints = np.fromfile(intdata, dtype="<u4")
+    reals = np.fromfile(realdata, dtype="<f8")
+    rows = reals.size - ints.size
+    if rows <= 0 or ints.size % rows or reals.size % rows:
+        raise ValueError(
+            f"Inconsistent profiling data in {intdata} and {realdata}")
+    width = ints.size // rows - 1
+    ints = ints.reshape(rows, width + 1)
+    reals = reals.reshape(rows, width + 2)
+
+    calls = ints[:, 1:].sum(axis=0, dtype=np.int64)
+    times = reals[:, 2:].sum(axis=0)
+    max_times = reals[:, 2:].max(axis=0) if rows else times
+    n_functions = min(n_functions, width)
+    entries = [
+        {"calls": int(calls[i]), "time": float(times[i]),
+         "max_time": float(max_times[i])}
+        for i in range(width)
+    ]
+    return {
+        "steps": rows,
+        "step_time": float(reals[:, 1].sum()),
+        "functions": entries[:n_functions],
+        "blocks": entries[n_functions:],
+    }
+
+
+def build_report(run_dir, info_path):
+    """
+    Build the ranked profile report of a run.
+
+    Function names and equation descriptions come from the model's
+    `*_info.json`. If the runtime also wrote a `*_prof.json` summary, its
+    block ids are used to label the blocks; otherwise blocks are matched
+    to the model's non-alias equations in order when the counts agree.
+
+    :run_dir: The run directory holding the profiling files.
+    :info_path: Path to the model's `*_info.json`.
+    :return: The report dict, or None if the run has no profiling data.
+    """
+    files = find_profile_files(run_dir)
+    if files is None:
+        return None
+    intdata, realdata, prof_json = files
+
+    info = {}
+    if info_path and os.path.isfile(info_path):
+        with open(info_path) as f:
+            info = json.load(f)
+    functions = info.get("functions", [])
+    equations = {eq["eqIndex"]: eq for eq in info.get("equations", [])}
+
+    profile = decode_profile(intdata, realdata, len(functions))
+
+    block_ids = None
+    if prof_json:
+        with open(prof_json) as f:
+            summary = json.load(f)
+        block_ids = [block.get("id") for block in summary.get("profileBlocks", [])]
+    if not block_ids or len(block_ids) != len(profile["blocks"]):
+        candidates = [index for index, eq in sorted(equations.items())
+                      if eq.get("tag") not in ("alias", "dummy")]
+        if len(candidates) == len(profile["blocks"]):
+            block_ids = candidates
+        else:
+            block_ids = [None] * len(profile["blocks"])
+
+    rows = []
+    for name, entry in zip(functions, profile["functions"]):
+        rows.append({"kind": "function", "id": None,
+                     "name": name if isinstance(name, str) else str(name),
+                     **entry})
+    for index, (block_id, entry) in enumerate(zip(block_ids, profile["blocks"])):
+        equation = equations.get(block_id, {})
+        rows.append({
+            "kind": "block",
+            "id": block_id,
+            "name": (_equation_label(equation) if equation
+                     else f"block #{index}"),
+            **entry,
+        })
+
+    total = profile["step_time"] or sum(row["time"] for row in rows) or 1.0
+    for row in rows:
+        row["fraction"] = row["time"] / total
+    rows.sort(key=lambda row: row["time"], reverse=True)
+
+    return {"steps": profile["steps"], "step_time": profile["step_time"],
+            "entries": rows}
+
+
+def save_report(report, run_dir):
+    """
+    Store a profile report as `profile.json` in a run directory.
+    """
+    with open(os.path.join(run_dir, PROFILE_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def format_report(report, limit=10):
+    """
+    Format the most expensive entries of a report as a text table.
+    """
+    lines = [f"{report['steps']} steps, {report['step_time']:.4g}s in steps",
+             f"{'time [s]':>10} {'share':>6} {'calls':>8}  entry"]
+    for row in report["entries"][:limit]:
+        lines.append(f"{row['time']:>10.4g} {row['fraction']:>6.1%} "
+                     f"{row['calls']:>8}  {row['kind']} {row['name']}")
+    if not report["entries"]:
+        lines.append("(no functions or equation blocks were profiled)")
+    return "\n".join(lines)
+
+
+def profile_run(run_dir, exe_path):
+    """
+    Build and store the profile report of a finished run.
+
+    :return: The report, or None if the run has no profiling data.
+    """
+    name = os.path.splitext(os.path.basename(exe_path))[0]
+    info_path = os.path.join(os.path.dirname(os.path.abspath(exe_path)),
+                             f"{name}_info.json")
+    try:
+        report = build_report(run_dir, info_path)
+    except (OSError, ValueError) as e:
+        logging.warning("Could not read the profiling data: %s", e)
+        return None
+    if report is None:
+        logging.warning(
+            "No profiling data found; the model must be compiled with "
+            "profiling enabled")
+        return None
+    save_report(report, run_dir)
+    return report
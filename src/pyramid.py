@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import struct
+
+import numpy as np
+
+from src.decimate import visible_window
+from src.resultfile import open_result
+
+PYRAMID_SUFFIX = ".pyramid"
+MAGIC = b"OMPYRAMD"
+# Samples per bucket of the finest level, as a power of two. Finer levels
+# would cost more disk than reading the samples themselves.
+MIN_SHIFT = 4
+# The coarsest level kept has at least this many buckets.
+MIN_BUCKETS = 64
+# Shorter results are decimated from their samples quickly enough.
+MIN_SAMPLES = 1 << 16
+# Bytes of trajectories reduced at once while a pyramid is written.
+BLOCK_BYTES = 32 * 1024 ** 2
+
+
+def pyramid_path(result_file):
+    """
+    Path of the pyramid sidecar of a result file.
+    """
+    return os.path.splitext(result_file)[0] + PYRAMID_SUFFIX
+
+
+def _levels(samples):
+    """
+    The power-of-two bucket sizes stored for a trajectory length.
+
+    :return: List of (shift, buckets); bucket i of a level covers the
+        samples [i << shift, (i + 1) << shift).
+    """
+    levels = []
+    shift = MIN_SHIFT
+    while (samples >> shift) >= MIN_BUCKETS:
+        levels.append((shift, -(-samples >> shift)))
+        shift += 1
+    return levels
+
+
+def _bucket_times(starts, ends, step, buckets):
+    """
+    The time at the centre of every bucket of a level.
+
+    :starts: Time of the first sample of every bucket of the finest level.
+    :ends: Time of the last sample of every bucket of the finest level.
+    :step: Number of finest buckets per bucket of the level.
+    """
+    first = np.arange(buckets) * step
+    last = np.minimum(first + step, len(starts)) - 1
+    return (starts[first] + ends[last]) / 2
+
+
+def _reduce(minimum, maximum):
+    """
+    Halve a level by merging neighbouring buckets (along the last axis).
+    """
+    if minimum.shape[-1] % 2:
+        minimum = np.concatenate((minimum, minimum[..., -1:]), axis=-1)
+        maximum = np.concatenate((maximum, maximum[..., -1:]), axis=-1)
+    return (np.minimum(minimum[..., 0::2], minimum[..., 1::2]),
+            np.maximum(maximum[..., 0::2], maximum[..., 1::2]))
+
+
+def write_pyramid(result_file, cancel_event=None):
+    """
+    Write the min/max pyramid sidecar of a result file.
+
+    For every trajectory, each level stores the minimum and maximum of
+    buckets of 2**shift samples, from 16 samples per bucket up to the
+    coarsest level with at least MIN_BUCKETS buckets. The finest level
+    is computed from the samples, every further level from the one below
+    it. The samples are read once, in blocks of time points holding every
+    trajectory, which is the order the runtime stores them in.
+
+    The file holds a short JSON header followed by the levels as raw
+    arrays, so a reader memory-maps it and touches only the buckets of
+    the variable and window it draws:
+
+        MAGIC, header length (uint32), JSON header, padding to 8 bytes,
+        then per level: bucket times (float64, buckets) and the values
+        (float64, variables x 2 x buckets; min row, then max row).
+
+    :cancel_event: A `threading.Event` that abandons the sidecar when set.
+    :return: Path of the sidecar, or None if the result is too short to
+        need one or writing it was cancelled.
+    """
+    result = open_result(result_file)
+    if result is None:
+        raise ValueError(f"Cannot read {result_file}")
+    samples = result.samples
+    names = result.trajectories()
+    levels = _levels(samples)
+    if not names or samples < MIN_SAMPLES:
+        return None
+
+    header = {"samples": samples, "names": names, "levels": []}
+    offset = 0
+    for shift, buckets in levels:
+        header["levels"].append({"shift": shift, "buckets": buckets,
+                                 "time": offset, "data": offset + 8 * buckets})
+        offset += 8 * buckets * (1 + 2 * len(names))
+    encoded = json.dumps(header).encode()
+    start = len(MAGIC) + 4 + len(encoded)
+    start += -start % 8
+
+    path = pyramid_path(result_file)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        f.truncate(start + offset)
+    data = np.memmap(temp_path, dtype="<f8", mode="r+", offset=start,
+                     shape=(offset // 8,))
+    try:
+        views = []
+        for (shift, buckets), level in zip(levels, header["levels"]):
+            base = level["data"] // 8
+            views.append(data[base:base + 2 * buckets * len(names)].reshape(
+                len(names), 2, buckets))
+
+        # The finest level, a block of whole buckets at a time.
+        shift, buckets = levels[0]
+        size = 1 << shift
+        block = max(BLOCK_BYTES // (8 * (len(names) + 1)) >> shift, 1) << shift
+        starts, ends = np.empty(buckets), np.empty(buckets)
+        cancelled = False
+        for first in range(0, samples, block):
+            cancelled = cancel_event is not None and cancel_event.is_set()
+            if cancelled:
+                break
+            # A time point per row, as the runtime stores them.
+            values = result.matrix(["time"] + names, first, first + block).T
+            count = -(-len(values) // size)
+            if len(values) < count * size:
+                values = np.concatenate((values, np.repeat(
+                    values[-1:], count * size - len(values), axis=0)))
+            values = values.reshape(count, size, values.shape[1])
+            bucket = first >> shift
+            starts[bucket:bucket + count] = values[:, 0, 0]
+            ends[bucket:bucket + count] = values[:, -1, 0]
+            views[0][:, 0, bucket:bucket + count] = values[:, :, 1:].min(
+                axis=1).T
+            views[0][:, 1, bucket:bucket + count] = values[:, :, 1:].max(
+                axis=1).T
+
+        if not cancelled:
+            for lower, view in zip(views, views[1:]):
+                view[:, 0], view[:, 1] = _reduce(lower[:, 0], lower[:, 1])
+            for (level_shift, level_buckets), level in zip(
+                    levels, header["levels"]):
+                base = level["time"] // 8
+                data[base:base + level_buckets] = _bucket_times(
+                    starts, ends, 1 << (level_shift - shift), level_buckets)
+            data.flush()
+    finally:
+        del data
+    if cancelled:
+        os.remove(temp_path)
+        return None
+    os.replace(temp_path, path)
+    return path
+
+
+def save_pyramid(result_file, cancel_event=None):
+    """
+    Write the pyramid sidecar of a finished run, logging instead of
+    raising on failure.
+
+    :cancel_event: See `write_pyramid`.
+    """
+    try:
+        return write_pyramid(result_file, cancel_event)
+    except (OSError, ValueError) as e:
+        logging.warning("Could not write the plot pyramid: %s", e)
+        return None
+
+
+class Pyramid:
+    """
+    A memory-mapped pyramid sidecar, read with `Pyramid.open`.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a pyramid file: {path}")
+            length, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+        start = len(MAGIC) + 4 + length
+        start += -start % 8
+        self.samples = header["samples"]
+        self.levels = header["levels"]
+        self._rows = {name: row for row, name in enumerate(header["names"])}
+        self._data = np.memmap(path, dtype="<f8", mode="r", offset=start)
+
+    @classmethod
+    def open(cls, result_file):
+        """
+        Open the sidecar of a result file.
+
+        :return: The pyramid, or None if there is none or it is unusable.
+        """
+        path = pyramid_path(result_file)
+        if not os.path.isfile(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring the plot pyramid %s: %s", path, e)
+            return None
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def _buckets(self, level, start, stop):
+        """
+        Range of the buckets of a level drawn for the time window
+        [start, stop], found by a binary search of their centre times.
+
+        :return: (first, last) slice bounds into the level.
+        """
+        base = level["time"] // 8
+        return visible_window(
+            self._data[base:base + level["buckets"]], start, stop)
+
+    def locate(self, start, stop):
+        """
+        Range of the samples covering the time window [start, stop], one
+        beyond each edge included, found from the finest level so the
+        time points of the result need not be read.
+
+        :return: (start, stop) slice bounds into the trajectories.
+        """
+        level = self.levels[0]
+        first, last = self._buckets(level, start, stop)
+        return (first << level["shift"],
+                min(last << level["shift"], self.samples))
+
+    def window(self, name, start, stop, pixels):
+        """
+        Min/max envelope of a variable over the time window [start, stop],
+        at the coarsest level that still has a bucket per pixel in it.
+
+        :return: (time, values) with the minimum and maximum of every
+            bucket at its centre time, or None if even the finest level
+            has fewer buckets than pixels and the samples should be drawn.
+        """
+        row = self._rows.get(name)
+        if row is None:
+            return None
+        for level in reversed(self.levels):
+            first, last = self._buckets(level, start, stop)
+            if last - first >= pixels:
+                break
+        else:
+            return None
+
+        buckets = level["buckets"]
+        base = level["time"] // 8
+        time = self._data[base + first:base + last]
+        base = level["data"] // 8 + row * 2 * buckets
+        minimum = self._data[base + first:base + last]
+        maximum = self._data[base + buckets + first:base + buckets + last]
+        return (np.repeat(time, 2),
+                np.stack((minimum, maximum), axis=1).ravel())
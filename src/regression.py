@@ -0,0 +1,220 @@
+import glob
+import json
+import logging
+import os
+import platform
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.compare import (
+    DEFAULT_ATOL, DEFAULT_RTOL, compare_results, format_comparison, sort_rows)
+from src.monitor import OutputMonitor
+from src.resultfile import open_result
+from src.simulation import run_model, unique_directory
+
+REPORT_FILE = "regression.json"
+JUNIT_FILE = "junit.xml"
+# Deviating variables listed per failed model.
+REPORTED_FAILURES = 10
+
+
+def find_models(models_dir):
+    """
+    Find the compiled models below a directory.
+
+    A compiled model is recognized by its `<name>_init.xml`, with the
+    executable `<name>` (`<name>.exe` on Windows) next to it.
+
+    :return: Sorted list of (name, executable path).
+    """
+    suffix = ".exe" if platform.system() == "Windows" else ""
+    models = []
+    pattern = os.path.join(models_dir, "**", "*_init.xml")
+    for init_file in glob.glob(pattern, recursive=True):
+        exe_path = init_file[:-len("_init.xml")] + suffix
+        if os.path.isfile(exe_path):
+            name = os.path.basename(init_file)[:-len("_init.xml")]
+            models.append((name, os.path.abspath(exe_path)))
+    return sorted(models)
+
+
+def find_reference(name, exe_path, reference_dir=None):
+    """
+    The reference result of a model: `<name>_res.mat` in the reference
+    directory if one is given, otherwise next to the executable (where
+    OpenModelica leaves the result of the run that built it).
+
+    :return: The path, or None if there is no reference.
+    """
+    directory = reference_dir or os.path.dirname(exe_path)
+    path = os.path.join(directory, f"{name}_res.mat")
+    return path if os.path.isfile(path) else None
+
+
+def check_result(reference_file, result_file, atol=DEFAULT_ATOL,
+                 rtol=DEFAULT_RTOL):
+    """
+    Check every trajectory of a reference result against a new result.
+
+    :return: (passed, message, rows) with the deviation rows of the
+        variables outside the tolerance, worst first.
+    """
+    reference = open_result(reference_file)
+    if reference is None:
+        raise ValueError(f"Cannot read the reference {reference_file}")
+    result = open_result(result_file)
+    if result is None:
+        raise ValueError(f"Cannot read the result {result_file}")
+
+    names = reference.trajectories()
+    missing = [name for name in names if name not in result]
+    problems = []
+    if missing:
+        problems.append(f"{len(missing)} variables missing, e.g. "
+                        + ", ".join(missing[:5]))
+    reference_time, result_time = reference.time, result.time
+    if len(result_time) == 0 or (
+            len(reference_time) and result_time[-1] < reference_time[-1]):
+        problems.append(
+            f"result ends at {result_time[-1] if len(result_time) else '-'}, "
+            f"reference at {reference_time[-1]}")
+
+    rows = compare_results(reference, result,
+                           [name for name in names if name in result],
+                           atol=atol, rtol=rtol)
+    failures = sort_rows([row for row in rows
+                          if row["diverges_at"] is not None], "max_rel")
+    if failures:
+        problems.append(f"{len(failures)} of {len(rows)} variables outside "
+                        f"atol={atol:g}, rtol={rtol:g}")
+    return not problems, "; ".join(problems), failures
+
+
+def _run_case(name, exe_path, reference_file, case_dir, tolerances, options):
+    """
+    Run one model and check its result against the reference.
+    """
+    case = {"name": name, "executable": exe_path,
+            "reference": reference_file, "directory": case_dir,
+            "failures": []}
+    started = time.monotonic()
+    try:
+        if reference_file is None:
+            case["status"], case["message"] = "error", "No reference result"
+            return case
+        monitor = OutputMonitor()
+        returncode = run_model(exe_path, {}, case_dir,
+                               on_stdout=monitor.feed, on_stderr=monitor.feed,
+                               **options)
+        if returncode != 0 or not monitor.succeeded:
+            case["status"] = "error"
+            case["message"] = (f"Simulation failed (exit code {returncode}): "
+                               + "; ".join(monitor.errors))
+            return case
+        passed, message, failures = check_result(
+            reference_file, os.path.join(case_dir, "result.mat"),
+            **tolerances)
+        case["status"] = "passed" if passed else "failed"
+        case["message"] = message
+        case["failures"] = failures[:REPORTED_FAILURES]
+    except Exception as e:
+        case["status"], case["message"] = "error", str(e)
+    finally:
+        case["duration"] = time.monotonic() - started
+    return case
+
+
+def run_regression(models_dir, reference_dir=None, output_root="output",
+                   max_workers=None, atol=DEFAULT_ATOL, rtol=DEFAULT_RTOL,
+                   on_case_done=None, timeout=None, cancel_event=None,
+                   limits=None):
+    """
+    Re-run every compiled model below a directory and check each result
+    against its stored reference within the given tolerances.
+
+    Models run with their built-in experiment settings, each in its own
+    directory of a new `regression` directory under `output_root`, on a
+    bounded thread pool as in `sweep.run_sweep`. The report is written
+    there as `regression.json` and `junit.xml`.
+
+    :models_dir: Directory searched for compiled models, see `find_models`.
+    :reference_dir: Directory of the reference results, see
+        `find_reference`.
+    :output_root: Directory in which the regression directory is created.
+    :max_workers: Size of the pool, defaults to the number of CPU cores.
+    :atol: Absolute tolerance of every trajectory.
+    :rtol: Relative tolerance of every trajectory.
+    :on_case_done: Called with each model's case dict as it finishes.
+    :timeout: Wall-clock limit of each model in seconds.
+    :cancel_event: A `threading.Event` that cancels all remaining models.
+    :limits: Resource limits of each model, see `simulation.execute`.
+    :return: The regression directory and the list of case dicts.
+    """
+    models = find_models(models_dir)
+    if not models:
+        raise ValueError(f"No compiled models found in {models_dir}")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    regression_dir = unique_directory(
+        os.path.abspath(os.path.join(output_root, "regression")))
+    logging.info("Regression of %d models on %d workers in %s",
+                 len(models), max_workers, regression_dir)
+
+    options = {"timeout": timeout, "cancel_event": cancel_event,
+               "limits": limits}
+    tolerances = {"atol": atol, "rtol": rtol}
+    cases = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = []
+        for name, exe_path in models:
+            case_dir = unique_directory(os.path.join(regression_dir, name))
+            futures.append(pool.submit(
+                _run_case, name, exe_path,
+                find_reference(name, exe_path, reference_dir), case_dir,
+                tolerances, options))
+        for future in as_completed(futures):
+            case = future.result()
+            if on_case_done:
+                on_case_done(case)
+            cases.append(case)
+
+    cases.sort(key=lambda case: (case["name"], case["directory"]))
+    with open(os.path.join(regression_dir, REPORT_FILE), "w") as f:
+        json.dump({"models_dir": os.path.abspath(models_dir),
+                   "atol": atol, "rtol": rtol, "cases": cases}, f, indent=2)
+    write_junit(cases, os.path.join(regression_dir, JUNIT_FILE))
+    logging.info("Regression finished: %d/%d models passed",
+                 sum(case["status"] == "passed" for case in cases),
+                 len(cases))
+    return regression_dir, cases
+
+
+def write_junit(cases, path):
+    """
+    Write the regression cases as a JUnit XML report, one test case per
+    model: deviations become failures, models that could not be run or
+    checked become errors.
+    """
+    suite = ET.Element(
+        "testsuite", name="regression", tests=str(len(cases)),
+        failures=str(sum(case["status"] == "failed" for case in cases)),
+        errors=str(sum(case["status"] == "error" for case in cases)),
+        time=f"{sum(case['duration'] for case in cases):.3f}")
+    for case in cases:
+        testcase = ET.SubElement(
+            suite, "testcase", name=case["name"],
+            classname=os.path.dirname(case["executable"]),
+            time=f"{case['duration']:.3f}")
+        if case["status"] == "failed":
+            failure = ET.SubElement(testcase, "failure",
+                                    message=case["message"])
+            if case["failures"]:
+                failure.text = format_comparison(case["failures"],
+                                                 REPORTED_FAILURES)
+        elif case["status"] == "error":
+            ET.SubElement(testcase, "error", message=case["message"])
+    tree = ET.ElementTree(suite)
+    ET.indent(tree)
+    tree.write(path, encoding="utf-8", xml_declaration=True)
@@ -1,56 +1,90 @@
 import logging
 
+from src.resultfile import open_result
 
-def run_simulation(file_path):
+# Maximum number of series drawn per axes when no variables are selected.
+MAX_SERIES = 8
+
+
+def load_result(file_path):
     """
-    Run the simulation using the data from the .mat file and plot the results.
-    It expects the .mat file to contain two variables: data_1 and data_2.
-    2D arrays are expected for both variables.
-    This script is made to the result generated from TwoConnectedTanks Model
+    Load a result file, returning None if it cannot be read or
+    contains no data.
     """
-    from scipy.io import loadmat
-    from matplotlib import pyplot as plt
-    # Load the .mat file
-    try:
-        data = loadmat(file_path)
-    except Exception as e:
-        logging.error("Error reading the .mat file: %s", e)
-        return
+    result = open_result(file_path)
 
     # Check if the file contains any data
-    if not data:
+    if result is not None and not len(result):
         logging.warning("The .mat file is empty or could not be loaded!")
-        return
-
-    # Create subplots
-    fig, axes = plt.subplots(1, 2, figsize=(12, 6))
-
-    # Plot for data_1
-    if "data_1" in data:
-        x = data["data_1"][:, 0]  # First  - since the data_1 returns 2d array
-        y = data["data_1"][:, 1]  # Second column
-        axes[0].plot(x, y, marker="o")
-        axes[0].set_xlabel("X-axis")
-        axes[0].set_ylabel("Y-axis")
-        axes[0].set_title("Plot of data_1")
-        axes[0].grid()
-    else:
-        logging.warning("data_1 not found in the .mat file.")
-        axes[0].set_title("data_1 not found")
-
-    # Plot for data_2
-    if "data_2" in data:
-        x = data["data_2"][:, 0]  # First column
-        y = data["data_2"][:, 1]  # Second column
-        axes[1].plot(x, y, marker="o")
-        axes[1].set_xlabel("X-axis")
-        axes[1].set_ylabel("Y-axis")
-        axes[1].set_title("Plot of data_2")
-        axes[1].grid()
-    else:
-        logging.warning("data_2 not found in the .mat file.")
-        axes[1].set_title("data_2 not found")
-
-    # Adjust layout and display the plots
-    plt.tight_layout()
-    plt.show()
+        return None
+    return result
+
+
+def _plot_series(ax, result, names, title):
+    """
+    Draw the trajectories of the given variables onto one axes.
+
+    Long trajectories are min/max decimated to the pixel width of the
+    axes; markers are only drawn when every sample is shown.
+    """
+    from src.decimate import POINTS_PER_PIXEL, minmax_decimate
+    max_points = POINTS_PER_PIXEL * int(ax.bbox.width)
+    for name in names:
+        time, values = result.trajectory(name)
+        marker = "o" if len(time) <= max_points else None
+        time, values = minmax_decimate(time, values, max_points)
+        ax.plot(time, values, marker=marker, label=name)
+    ax.set_xlabel("time [s]")
+    ax.set_title(title if names else f"{title}: none found")
+    if names:
+        ax.legend(fontsize="small")
+    ax.grid()
+
+
+def split_variables(result, variables=None):
+    """
+    Split the variables to plot into values and derivatives `der(...)`.
+
+    :variables: Names to plot, by default the model's trajectories.
+    :return: The two lists of names, each at most MAX_SERIES long.
+    """
+    if variables is None:
+        variables = result.trajectories()
+    variables = [name for name in variables if name in result]
+    derivatives = [name for name in variables if name.startswith("der(")]
+    values = [name for name in variables if not name.startswith("der(")]
+    return values[:MAX_SERIES], derivatives[:MAX_SERIES]
+
+
+def plot_data(axes, result, variables=None):
+    """
+    Draw a loaded result onto a pair of axes.
+
+    The first axes shows the selected variables (by default the model's
+    trajectories), the second their derivatives `der(...)`.
+    """
+    values, derivatives = split_variables(result, variables)
+    _plot_series(axes[0], result, values, "Variables")
+    _plot_series(axes[1], result, derivatives, "Derivatives")
+
+
+def save_plot(file_path, image_path, variables=None):
+    """
+    Plot the results of a .mat file into an image file without a GUI.
+
+    A bare matplotlib Figure is used instead of pyplot so no interactive
+    backend (and no Qt) is loaded.
+
+    :return: True if the image was written.
+    """
+    from matplotlib.figure import Figure
+    result = load_result(file_path)
+    if result is None:
+        return False
+
+    fig = Figure(figsize=(12, 6))
+    axes = fig.subplots(1, 2)
+    plot_data(axes, result, variables)
+    fig.tight_layout()
+    fig.savefig(image_path)
+    return True
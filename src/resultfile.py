@@ -0,0 +1,541 @@
+import functools
+import logging
+import os
+import struct
+
+# MAT v4 element types, indexed by the P digit of the matrix type.
+MAT4_DTYPES = ("f8", "f4", "i4", "i2", "u2", "u1")
+# Matrices that hold the trajectories; everything else is small metadata.
+DATA_MATRICES = ("data_1", "data_2")
+# Metadata matrices read only when first used; descriptions are often
+# much larger than the names and rarely needed.
+LAZY_MATRICES = ("description",)
+# Most bytes of a growing result read by one `GrowingResult.poll`.
+POLL_BYTES = 64 * 1024 ** 2
+
+
+def _read_mat4(file_path, partial=False, headers=None):
+    """
+    Open a MAT v4 file, reading only the matrix headers and metadata.
+
+    MAT v4 is a sequence of matrices, each a fixed 20-byte header (type,
+    rows, columns, imaginary flag, name length), the name and the values
+    in column-major order. The headers are walked with seeks, so opening a
+    file costs a few small reads however large it is. The metadata
+    matrices are read eagerly; `data_1` and `data_2` are memory-mapped,
+    so only the pages of the values actually used are ever read. The
+    LAZY_MATRICES are not read either; a function reading them is stored
+    in their place.
+
+    :partial: Map every complete column of the data matrices present in
+        the file, whatever their header claims. The runtime writes the
+        `data_2` header with no columns and fills in the count when the
+        run ends, so this is how a result still being written is read.
+    :headers: Optional dict, filled with the (offset, dtype, rows,
+        columns) of every matrix for readers that come back to the file.
+    :return: Mapping of matrix names to arrays (text matrices as a list
+        of row strings), or None if the file is not MAT v4.
+    """
+    import numpy as np
+
+    matrices = {}
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        while True:
+            header = f.read(20)
+            if len(header) < 20:
+                break
+            mtype, mrows, ncols, imagf, namlen = struct.unpack("<5i", header)
+            if mtype < 0 or mtype > 4052 or namlen <= 0 or namlen > 1024:
+                mtype, mrows, ncols, imagf, namlen = struct.unpack(
+                    ">5i", header)
+                if mtype < 1000 or mtype > 1052 or not 0 < namlen <= 1024:
+                    if not matrices:
+                        return None
+                    raise ValueError(f"Corrupt MAT v4 header in {file_path}")
+            byteorder = ">" if mtype // 1000 else "<"
+            precision = (mtype // 10) % 10
+            is_text = mtype % 10 == 1
+            if precision >= len(MAT4_DTYPES):
+                raise ValueError(f"Unsupported MAT v4 type {mtype}")
+            dtype = np.dtype(byteorder + MAT4_DTYPES[precision])
+            name = f.read(namlen).rstrip(b"\x00").decode("latin-1")
+            offset = f.tell()
+            size = mrows * ncols * dtype.itemsize * (2 if imagf else 1)
+            if headers is not None:
+                headers[name] = (offset, dtype, mrows, ncols)
+
+            if name in DATA_MATRICES:
+                # A result that is still being written may hold fewer
+                # columns than its header claims; map the complete ones.
+                available = (file_size - offset) // max(
+                    mrows * dtype.itemsize, 1)
+                growing = partial and name == "data_2"
+                complete = available if growing else min(ncols, available)
+                # Column-major (mrows x ncols) is C-order (ncols x mrows).
+                if complete:
+                    data = np.memmap(file_path, dtype=dtype, mode="r",
+                                     offset=offset, shape=(complete, mrows))
+                else:
+                    data = np.empty((0, mrows), dtype=dtype)
+                matrices[name] = data.T
+                if growing or complete < ncols:
+                    # Nothing complete can follow a matrix being written.
+                    break
+            elif name in LAZY_MATRICES:
+                matrices[name] = functools.partial(
+                    _read_matrix, file_path, offset, dtype, mrows, ncols,
+                    is_text)
+            else:
+                matrices[name] = _read_matrix(f, offset, dtype, mrows, ncols,
+                                              is_text)
+            f.seek(offset + size)
+    return matrices
+
+
+def _read_matrix(file, offset, dtype, rows, columns, is_text):
+    """
+    Read the values of a MAT v4 matrix.
+
+    :file: An open file, or the path of the file.
+    :offset: Position of the values in the file.
+    :return: The array, or a list of row strings for a text matrix.
+    """
+    import numpy as np
+
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            return _read_matrix(f, offset, dtype, rows, columns, is_text)
+    file.seek(offset)
+    data = np.fromfile(file, dtype=dtype, count=rows * columns)
+    data = data.reshape(columns, rows).T
+    if is_text:
+        data = [bytes(row).decode("latin-1") for row in data.astype(np.uint8)]
+    return data
+
+
+def _char_matrix_to_strings(matrix, transposed):
+    """
+    Decode a MAT character matrix into a list of stripped strings.
+
+    :matrix: The matrix as loaded, one string per matrix row.
+    :transposed: True if the strings are stored in the matrix columns
+        (OpenModelica's `binTrans` layout).
+    """
+    rows = [str(row) for row in matrix]
+    if not transposed:
+        return [row.rstrip("\x00 ") for row in rows]
+    if not rows:
+        return []
+    import numpy as np
+
+    # Transpose the characters as a (rows x width) code point matrix
+    # instead of joining tens of thousands of strings one by one.
+    width = max(len(row) for row in rows)
+    codes = np.array(rows, dtype=f"<U{width}").view(np.uint32).reshape(
+        len(rows), width)
+    columns = np.ascontiguousarray(codes.T).view(f"<U{len(rows)}").ravel()
+    return [column.rstrip("\x00 ") for column in columns.tolist()]
+
+
+class ResultFile:
+    """
+    An OpenModelica simulation result (`*_res.mat`) indexed by variable name.
+
+    OpenModelica stores every variable exactly once per matrix column and
+    maps names onto them through `dataInfo`: row 0 selects `data_1`
+    (parameters, constant over the run) or `data_2` (trajectories), row 1
+    holds the 1-based column, negative for negated aliases. The index built
+    here turns a variable name into (matrix, column, sign) so that any
+    variable is found in O(1). Only the requested variable's values are
+    materialized; the data matrices themselves stay memory-mapped.
+    """
+
+    def __init__(self, matrices):
+        """
+        :matrices: Mapping of the MAT matrix names (`Aclass`, `name`,
+            `description`, `dataInfo`, `data_1`, `data_2`) to arrays;
+            `description` may be a function returning it.
+        """
+        aclass = _char_matrix_to_strings(matrices.get("Aclass", []), False)
+        self.transposed = len(aclass) > 3 and aclass[3] == "binTrans"
+        self._matrices = matrices
+
+        names = _char_matrix_to_strings(matrices["name"], self.transposed)
+        info = matrices["dataInfo"]
+        if not self.transposed:
+            info = info.T
+
+        self.names = names
+        # Descriptions are often much larger than the names and rarely
+        # needed, so they are read and decoded on first use.
+        self._descriptions = None
+        self._index = {}
+        for name, matrix, column in zip(names, info[0], info[1]):
+            # dataInfo row 0 is 0 for the abscissa (time), which is the
+            # first column of data_2.
+            matrix = int(matrix) or 2
+            column = int(column)
+            self._index[name] = (matrix, abs(column) - 1, column < 0)
+
+    @classmethod
+    def from_trajectories(cls, names, data):
+        """
+        Build a result from plain trajectories, as read from the CSV and
+        PLT output formats.
+
+        :names: Variable names, `time` first.
+        :data: Array with one row per variable, aligned with `names`.
+        """
+        import numpy as np
+        result = cls.__new__(cls)
+        result.transposed = True
+        result._matrices = {"data_1": np.zeros((0, 2)), "data_2": data}
+        result.names = list(names)
+        result._descriptions = dict.fromkeys(result.names, "")
+        result._index = {name: (2, column, False)
+                         for column, name in enumerate(result.names)}
+        return result
+
+    def _data(self, matrix):
+        """
+        Return data_1 or data_2 with one variable per row.
+        """
+        data = self._matrices[f"data_{matrix}"]
+        return data if self.transposed else data.T
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def time(self):
+        """
+        The time points of the stored trajectories.
+        """
+        import numpy as np
+        return np.array(self._data(2)[0])
+
+    @property
+    def samples(self):
+        """
+        The number of time points of the stored trajectories.
+        """
+        return self._data(2).shape[1]
+
+    def time_span(self):
+        """
+        The first and last time point, read without the ones in between.
+
+        :return: (first, last), or None if there are no time points.
+        """
+        time = self._data(2)[0]
+        return (float(time[0]), float(time[-1])) if len(time) else None
+
+    def description(self, name):
+        """
+        The description (comment) of a variable.
+        """
+        if self._descriptions is None:
+            matrix = self._matrices["description"]
+            if callable(matrix):
+                matrix = matrix()
+            self._descriptions = dict(zip(self.names, _char_matrix_to_strings(
+                matrix, self.transposed)))
+        return self._descriptions[name]
+
+    def is_parameter(self, name):
+        """
+        True if the variable is stored in data_1, i.e. constant over time.
+        """
+        return self._index[name][0] == 1
+
+    def values(self, name, start=None, stop=None):
+        """
+        Return the stored values of a variable.
+
+        Trajectories have one value per entry of `time`; parameters have
+        their start and end value.
+
+        :start: First sample to return, by default the first.
+        :stop: End of the samples to return, by default the last.
+        """
+        try:
+            matrix, column, negated = self._index[name]
+        except KeyError:
+            raise KeyError(f"Variable '{name}' not found in result") from None
+        # Copy out just this variable, so memory scales with the number of
+        # variables used, not with the size of the file.
+        import numpy as np
+        values = np.array(self._data(matrix)[column][start:stop])
+        if negated:
+            np.negative(values, out=values)
+        return values
+
+    def trajectory(self, name, start=None, stop=None):
+        """
+        Return (time, values) of a variable sampled at every time point,
+        expanding parameters to a constant trajectory.
+
+        :start: First time point to return, by default the first.
+        :stop: End of the time points to return, by default the last.
+        """
+        import numpy as np
+        time = np.array(self._data(2)[0][start:stop])
+        if self.is_parameter(name):
+            return time, np.full(time.shape, self.values(name)[0])
+        return time, self.values(name, start, stop)
+
+    def matrix(self, names, start=None, stop=None):
+        """
+        Return the trajectories of several variables as one array with a
+        row per variable and a column per time point.
+
+        The rows are gathered from the data matrices with a single
+        indexed read instead of a read per variable; parameters are
+        expanded to constant rows.
+
+        The array has the memory layout of the file: in the `binTrans`
+        layout, where a time point is stored after the other, it is
+        Fortran-ordered, so the values of a time point are contiguous and
+        are gathered in one sequential pass over the file.
+
+        :start: First time point to return, by default the first.
+        :stop: End of the time points to return, by default the last.
+        """
+        import numpy as np
+        trajectories = self._data(2)[:, start:stop]
+        count = trajectories.shape[1]
+        index = [self._index[name] for name in names]
+        # Parameters are read as constant rows after the trajectories.
+        constants = {}
+        positions = [column if matrix == 2 else trajectories.shape[0]
+                     + constants.setdefault(column, len(constants))
+                     for matrix, column, _ in index]
+        # Gathered along the axis of the variables in storage order; time
+        # points are read in one sequential pass first, the variables of
+        # each then picked in memory.
+        axis = 1 if self.transposed else 0
+        source = (np.array(trajectories.T) if self.transposed
+                  else np.asarray(trajectories))
+        if constants:
+            values = self._data(1)[list(constants), 0]
+            source = np.concatenate((source, np.broadcast_to(
+                values, (count, len(values))) if self.transposed
+                else np.broadcast_to(values[:, None], (len(values), count))),
+                axis=axis)
+        if positions and positions == list(range(
+                positions[0], positions[0] + len(positions))):
+            # Neighbouring columns, e.g. all trajectories in file order.
+            rows = source[(slice(None),) * axis
+                          + (slice(positions[0], positions[-1] + 1),)]
+        else:
+            rows = np.take(source, positions, axis=axis)
+        if self.transposed:
+            rows = rows.T
+        # Time-major rows are a copy already; others may be a view of the
+        # mapped file.
+        rows = rows.astype(np.float64, copy=not self.transposed)
+        if any(negated for _, _, negated in index):
+            signs = np.array([-1.0 if negated else 1.0
+                              for _, _, negated in index])
+            rows *= signs[:, None]
+        return rows
+
+    def trajectories(self):
+        """
+        Names of the time-varying variables, without time itself.
+        """
+        return [name for name in self.names
+                if name != "time" and not self.is_parameter(name)]
+
+
+def _read_csv(file_path):
+    """
+    Read a result written with `outputFormat=csv`: a header row of quoted
+    variable names followed by one row of values per time point.
+    """
+    import csv
+    import numpy as np
+
+    with open(file_path, newline="") as f:
+        names = [name.strip() for name in next(csv.reader(f))]
+        # OpenModelica may end every row with a separator.
+        while names and not names[-1]:
+            names.pop()
+        data = np.loadtxt(f, delimiter=",", usecols=range(len(names)),
+                          ndmin=2)
+    return ResultFile.from_trajectories(names, data.T)
+
+
+def _read_plt(file_path):
+    """
+    Read a result written with `outputFormat=plt`: one `DataSet: <name>`
+    block of `time, value` lines per variable.
+    """
+    import numpy as np
+
+    names, blocks, lines = [], [], None
+    with open(file_path) as f:
+        for line in f:
+            if line.startswith("DataSet:"):
+                names.append(line.split(":", 1)[1].strip())
+                lines = []
+                blocks.append(lines)
+            elif lines is not None and line[:1] not in ("", "#", "\n"):
+                lines.append(line)
+    if not blocks:
+        raise ValueError(f"No data sets found in {file_path}")
+    columns = [np.loadtxt(block, delimiter=",", ndmin=2) for block in blocks]
+    data = np.vstack([columns[0][:, 0]] + [column[:, 1] for column in columns])
+    if names[0] != "time":
+        names.insert(0, "time")
+    else:
+        data = data[1:]
+    return ResultFile.from_trajectories(names, data)
+
+
+def open_result(file_path):
+    """
+    Open an OpenModelica result file.
+
+    Results are decoded with NumPy alone: MAT v4 (what OpenModelica writes
+    for `outputFormat=mat`) is opened lazily with `_read_mat4`, CSV and PLT
+    are parsed directly. scipy is only imported as a fallback for MAT
+    files of another version.
+
+    :return: A `ResultFile`, or None if the file cannot be read.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    try:
+        if extension == ".csv":
+            return _read_csv(file_path)
+        if extension == ".plt":
+            return _read_plt(file_path)
+        matrices = _read_mat4(file_path)
+        if matrices is None:
+            from scipy.io import loadmat
+            matrices = loadmat(file_path)
+        return ResultFile(matrices)
+    except Exception as e:
+        logging.error("Error reading the result file: %s", e)
+        return None
+
+
+class GrowingResult:
+    """
+    The MAT v4 result of a simulation that is still running, read as it
+    grows.
+
+    The headers and metadata are read once the runtime has written them;
+    every `poll` then reads only the `data_2` columns (time points)
+    appended since the previous one, so following a long run costs the
+    size of its new output, not of the whole file. No file is kept open
+    or mapped between polls, so the result can be moved once the run
+    ends.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        # The metadata as a `ResultFile`, once readable; it holds no
+        # trajectories, see `poll`.
+        self.result = None
+        # Number of time points read so far.
+        self.samples = 0
+        self._layout = None
+
+    def open(self):
+        """
+        Read the headers and metadata, if not done yet.
+
+        :return: False if they have not been written yet.
+        """
+        if self.result is not None:
+            return True
+        import numpy as np
+
+        headers = {}
+        try:
+            matrices = _read_mat4(self.file_path, partial=True,
+                                  headers=headers)
+            if not matrices or "data_2" not in matrices:
+                return False
+            # Drop the mappings of the data matrices; parameters are
+            # kept as a copy, trajectories are read by `poll`.
+            offset, dtype, rows, _ = headers["data_2"]
+            matrices["data_1"] = np.array(matrices["data_1"])
+            matrices["data_2"] = np.empty((rows, 0), dtype=dtype)
+            result = ResultFile(matrices)
+        except (OSError, ValueError, KeyError, struct.error):
+            return False
+        if not result.transposed:
+            # Only the `binTrans` layout appends whole time points.
+            return False
+        self.result = result
+        self._layout = offset, dtype, rows
+        return True
+
+    def last_time(self):
+        """
+        The time of the last time point written so far, reading only
+        that value.
+
+        :return: The time, or None if no time point was written yet.
+        """
+        import numpy as np
+
+        if not self.open():
+            return None
+        offset, dtype, rows = self._layout
+        column_size = rows * dtype.itemsize
+        try:
+            with open(self.file_path, "rb") as f:
+                count = (os.fstat(f.fileno()).st_size - offset) // column_size
+                if count <= 0:
+                    return None
+                # Time is the first row of data_2.
+                f.seek(offset + (count - 1) * column_size)
+                value = np.fromfile(f, dtype=dtype, count=1)
+        except OSError:
+            return None
+        return float(value[0]) if len(value) else None
+
+    def poll(self, names=(), max_bytes=POLL_BYTES):
+        """
+        Read the time points written since the previous call.
+
+        :names: Variables whose values are returned; parameters are
+            expanded to constant rows.
+        :max_bytes: Most bytes of the file read by one call; call again
+            while it returns time points to catch up with a long run.
+        :return: (time, values) of the new time points, with a row of
+            values per name, or None if the file cannot be read yet.
+        """
+        import numpy as np
+
+        if not self.open():
+            return None
+        offset, dtype, rows = self._layout
+        column_size = rows * dtype.itemsize
+        with open(self.file_path, "rb") as f:
+            available = (os.fstat(f.fileno()).st_size - offset) // column_size
+            count = max(min(available - self.samples,
+                            max_bytes // column_size), 0)
+            f.seek(offset + self.samples * column_size)
+            data = np.fromfile(f, dtype=dtype, count=count * rows)
+        count = len(data) // rows
+        data = data[:count * rows].reshape(count, rows).T
+        self.samples += count
+
+        values = np.empty((len(names), count))
+        for row, name in enumerate(names):
+            matrix, column, negated = self.result._index[name]
+            if matrix == 1:
+                values[row] = self.result._data(1)[column][0]
+            else:
+                values[row] = data[column]
+            if negated:
+                np.negative(values[row], out=values[row])
+        return np.array(data[0]), values
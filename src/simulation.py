@@ -0,0 +1,444 @@
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+
+from src.resultfile import GrowingResult
+from src.stats import StatsParser, save_metrics
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRATCH_DIR = ".scratch"
+# Log streams enabled for every run; LOG_STATS adds the timing and solver
+# statistics block at the end of the output.
+STATS_FLAG = "-lv=LOG_STDOUT,LOG_ASSERT,LOG_STATS"
+# Seconds a terminated model gets to exit before it is killed.
+KILL_GRACE_PERIOD = 5
+# Seconds between two checks of the timeout and cancel event.
+WATCHDOG_INTERVAL = 0.1
+# Seconds between two reads of the simulated time reached, see `run_model`.
+PROGRESS_INTERVAL = 0.5
+# Files in the run directory capturing the model's output streams.
+STDOUT_FILE = "stdout.log"
+STDERR_FILE = "stderr.log"
+# Default size of each output file in bytes, see `CappedLog`;
+# override with the `output_bytes` limit of a run.
+OUTPUT_LIMIT = 4 * 1024 ** 2
+
+
+def validate_times(start_time, stop_time):
+    """
+    Validate the simulation start and stop times.
+
+    :start_time: Simulation start time (string or number).
+    :stop_time: Simulation stop time (string or number).
+    :raises ValueError: With a user-facing message if the times are invalid.
+    """
+    if start_time in (None, "") or stop_time in (None, ""):
+        raise ValueError("Please enter a start and stop time")
+    try:
+        start, stop = float(start_time), float(stop_time)
+    except ValueError:
+        raise ValueError("Start and stop time must be numbers") from None
+    if stop <= start:
+        raise ValueError("Stop time must be greater than start time")
+
+
+def format_overrides(overrides):
+    """
+    Format a mapping of variable names to values as the value of the
+    model executable's `-override` flag.
+
+    :overrides: Mapping of overridable names (e.g. `stopTime`, `tank1.A`)
+        to their values.
+    """
+    return ",".join(f"{name}={value}" for name, value in overrides.items())
+
+
+def build_command(exe_path, overrides, result_file="result.mat",
+                  extra_args=()):
+    """
+    Build the command line used to launch a compiled model executable.
+
+    :exe_path: Path to the model executable.
+    :overrides: Mapping of names to values passed through `-override`.
+    :result_file: Name (or path) of the result file written by the model.
+    :extra_args: Additional runtime flags appended to the command line.
+    """
+    command = [exe_path]
+    if overrides:
+        command.append(f"-override={format_overrides(overrides)}")
+    command.append(f"-r={result_file}")
+    command.extend(extra_args)
+    return command
+
+
+def _pump(stream, callback):
+    """
+    Forward every line read from a stream to the callback.
+    """
+    for line in iter(stream.readline, ""):
+        if callback:
+            callback(line.rstrip("\r\n"))
+    stream.close()
+
+
+class SimulationAborted(Exception):
+    """
+    Raised when a run was stopped before the model exited on its own.
+    """
+
+
+class SimulationTimeout(SimulationAborted):
+    """
+    Raised when a run exceeded its wall-clock timeout.
+    """
+
+
+class SimulationCancelled(SimulationAborted):
+    """
+    Raised when a run was cancelled by the user.
+    """
+
+
+def _limit_values(limits):
+    """
+    The (resource, value) pairs of the `cpu_seconds` and `memory_bytes`
+    limits of a run.
+    """
+    values = []
+    if limits.get("cpu_seconds"):
+        values.append((resource.RLIMIT_CPU, int(limits["cpu_seconds"])))
+    if limits.get("memory_bytes"):
+        values.append((resource.RLIMIT_AS, int(limits["memory_bytes"])))
+    return values
+
+
+def _apply_limits(process, limits):
+    """
+    Apply the limits of a run to the started model process with
+    `resource.prlimit` (Linux). The process is terminated if they cannot
+    be applied.
+    """
+    try:
+        for limit, value in _limit_values(limits):
+            resource.prlimit(process.pid, limit, (value, value))
+    except ProcessLookupError:
+        pass  # The model already exited.
+    except OSError:
+        terminate_process_tree(process)
+        raise
+
+
+def _limit_command(command, limits):
+    """
+    Wrap a command in a shell that applies the limits of a run with
+    `ulimit` and then execs the model, for POSIX systems without
+    `resource.prlimit`.
+    """
+    settings = []
+    for limit, value in _limit_values(limits):
+        if limit == resource.RLIMIT_CPU:
+            settings.append(f"ulimit -t {value}")
+        else:
+            # ulimit -v counts kilobytes.
+            settings.append(f"ulimit -v {value // 1024}")
+    if not settings:
+        return command
+    return ["/bin/sh", "-c", " && ".join(settings) + ' && exec "$@"', "sh",
+            *command]
+
+
+def terminate_process_tree(process, grace_period=KILL_GRACE_PERIOD):
+    """
+    Terminate a model process and everything it started, escalating to a
+    hard kill if it has not exited after `grace_period` seconds.
+
+    On POSIX the model runs in its own session, so the whole process group
+    is signalled. On Windows `taskkill /T` walks the process tree.
+    """
+    if process.poll() is not None:
+        return
+    if os.name == "nt":
+        process.terminate()
+        try:
+            process.wait(grace_period)
+        except subprocess.TimeoutExpired:
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                capture_output=True)
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(grace_period)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def execute(command, cwd, on_stdout=None, on_stderr=None, timeout=None,
+            cancel_event=None, limits=None):
+    """
+    Run a model executable and stream its output line by line.
+
+    stdout is read on the calling thread and stderr on a helper thread so
+    that neither pipe can fill up and stall the model. Each line is passed
+    to the matching callback as soon as it is produced. A watchdog thread
+    stops the process tree when the timeout expires or the cancel event is
+    set.
+
+    :command: The command line, as returned by `build_command`.
+    :cwd: Working directory for the model process.
+    :on_stdout: Called with every stdout line (without line ending).
+    :on_stderr: Called with every stderr line (without line ending).
+    :timeout: Wall-clock limit of the run in seconds.
+    :cancel_event: A `threading.Event` that cancels the run when set.
+    :limits: Optional dict with `cpu_seconds` and/or `memory_bytes`,
+        applied to the child as RLIMIT_CPU / RLIMIT_AS (POSIX only).
+    :return: The exit code of the model process.
+    :raises SimulationTimeout: If the run exceeded `timeout`.
+    :raises SimulationCancelled: If `cancel_event` was set.
+    """
+    # Limits are applied from outside the child rather than with a
+    # `preexec_fn`, which is not safe in a process running threads.
+    options = {}
+    limited = bool(limits) and resource is not None
+    if os.name == "nt":
+        options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        options["start_new_session"] = True
+        if limited and not hasattr(resource, "prlimit"):
+            command = _limit_command(command, limits)
+
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+        **options,
+    )
+    if limited and hasattr(resource, "prlimit"):
+        _apply_limits(process, limits)
+
+    aborted = []
+
+    def watchdog():
+        deadline = time.monotonic() + timeout if timeout else None
+        while process.poll() is None:
+            if cancel_event is not None and cancel_event.is_set():
+                aborted.append(SimulationCancelled("Simulation cancelled"))
+            elif deadline is not None and time.monotonic() > deadline:
+                aborted.append(SimulationTimeout(
+                    f"Simulation exceeded the timeout of {timeout}s"))
+            if aborted:
+                terminate_process_tree(process)
+                return
+            time.sleep(WATCHDOG_INTERVAL)
+
+    watchdog_thread = None
+    if timeout or cancel_event is not None:
+        watchdog_thread = threading.Thread(target=watchdog, daemon=True)
+        watchdog_thread.start()
+
+    stderr_thread = threading.Thread(
+        target=_pump, args=(process.stderr, on_stderr), daemon=True)
+    stderr_thread.start()
+    _pump(process.stdout, on_stdout)
+    stderr_thread.join()
+    returncode = process.wait()
+    if watchdog_thread is not None:
+        watchdog_thread.join()
+    if aborted:
+        raise aborted[0]
+    return returncode
+
+
+def run_model(exe_path, overrides, run_dir, on_stdout=None, on_stderr=None,
+              extra_args=(), on_time=None, **options):
+    """
+    Run a model executable inside its own run directory.
+
+    The model is started with the run directory as its working directory
+    and output path, reads its input files (`*_init.xml`, `*_info.json`)
+    from the executable's folder and writes `result.mat` into the run
+    directory. Its stdout and stderr are captured in `stdout.log` and
+    `stderr.log` there (each capped to the `output_bytes` limit, default
+    OUTPUT_LIMIT, see `CappedLog`), so concurrent runs of the same model
+    never touch each other's files.
+    The runtime's LOG_STATS timing and solver statistics are parsed while
+    the model runs and stored as `metrics.json` in the run directory.
+
+    :exe_path: Path to the model executable.
+    :overrides: Mapping of names to values passed through `-override`.
+    :run_dir: The directory owned by this run.
+    :on_stdout: Called with every stdout line (without line ending).
+    :on_stderr: Called with every stderr line (without line ending).
+    :extra_args: Additional runtime flags appended to the command line.
+    :on_time: Called with the simulated time reached, every
+        PROGRESS_INTERVAL seconds while the model runs, from a helper
+        thread. The runtime does not print it at the log levels used, so
+        it is read from the last time point written to `result.mat`.
+    :options: `timeout`, `cancel_event` and `limits`, see `execute`;
+        `limits` may also hold `output_bytes`.
+    :return: The exit code of the model process.
+    """
+    exe_path = os.path.abspath(exe_path)
+    run_dir = os.path.abspath(run_dir)
+    result_file = os.path.join(run_dir, "result.mat")
+    command = build_command(
+        exe_path,
+        overrides,
+        result_file,
+        extra_args=(
+            f"-inputPath={os.path.dirname(exe_path)}",
+            f"-outputPath={run_dir}",
+            STATS_FLAG,
+            *extra_args,
+        ),
+    )
+
+    stats = StatsParser()
+    max_bytes = (options.get("limits") or {}).get("output_bytes",
+                                                  OUTPUT_LIMIT)
+    with CappedLog(os.path.join(run_dir, STDOUT_FILE), max_bytes) as stdout, \
+            CappedLog(os.path.join(run_dir, STDERR_FILE), max_bytes) as stderr:
+        def tee(log_file, *callbacks):
+            def forward(line):
+                log_file.write(line)
+                for callback in callbacks:
+                    if callback:
+                        callback(line)
+            return forward
+
+        finished = threading.Event()
+
+        def follow_time():
+            growing = GrowingResult(result_file)
+            while not finished.wait(PROGRESS_INTERVAL):
+                simulated_time = growing.last_time()
+                if simulated_time is not None:
+                    on_time(simulated_time)
+
+        time_thread = None
+        if on_time is not None:
+            time_thread = threading.Thread(target=follow_time, daemon=True)
+            time_thread.start()
+        try:
+            return execute(
+                command,
+                run_dir,
+                on_stdout=tee(stdout, stats.feed, on_stdout),
+                on_stderr=tee(stderr, on_stderr),
+                **options,
+            )
+        finally:
+            finished.set()
+            if time_thread is not None:
+                time_thread.join()
+            if stats.found:
+                save_metrics(stats.metrics, run_dir)
+
+
+class CappedLog:
+    """
+    A file capturing an output stream line by line, bounded to about
+    `max_bytes` bytes of UTF-8.
+
+    The first half of the budget is written to the file as the lines
+    arrive. After that only the most recent lines fitting in the other
+    half are kept, in memory, and written when the log is closed, behind
+    a line telling how much output was left out in between. The file thus
+    holds the start of a run (setup, initialization) and its end (errors,
+    statistics), however verbose the run.
+    """
+
+    def __init__(self, path, max_bytes=OUTPUT_LIMIT):
+        self.file = open(path, "w", encoding="utf-8", errors="replace")
+        self.head_bytes = max_bytes // 2
+        self.tail_bytes = max_bytes - self.head_bytes
+        self.written = 0
+        self.tail = deque()
+        self.tail_size = 0
+        self.omitted_lines = 0
+        self.omitted_bytes = 0
+
+    def write(self, line):
+        size = len(line.encode("utf-8", "replace")) + 1
+        if not self.tail and self.written + size <= self.head_bytes:
+            self.file.write(line + "\n")
+            self.written += size
+            return
+        self.tail.append((line, size))
+        self.tail_size += size
+        while self.tail_size > self.tail_bytes:
+            _, size = self.tail.popleft()
+            self.tail_size -= size
+            self.omitted_lines += 1
+            self.omitted_bytes += size
+
+    def close(self):
+        if self.omitted_lines:
+            self.file.write(f"... {self.omitted_lines} lines "
+                            f"({self.omitted_bytes} bytes) omitted ...\n")
+        self.file.writelines(line + "\n" for line, _ in self.tail)
+        self.tail.clear()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def unique_directory(path):
+    """
+    Create and return a new directory, adding a numeric suffix to `path`
+    until an unused name is found.
+    """
+    candidate = path
+    counter = 1
+    while True:
+        try:
+            os.makedirs(candidate)
+            return candidate
+        except FileExistsError:
+            candidate = f"{path}_{counter}"
+            counter += 1
+
+
+def create_scratch_directory(output_root="output"):
+    """
+    Create a private scratch directory for a single run.
+
+    :output_root: The output directory; scratch directories live in its
+        `.scratch` subdirectory so they can be moved into place cheaply.
+    """
+    scratch_root = os.path.join(output_root, SCRATCH_DIR)
+    os.makedirs(scratch_root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="run_", dir=scratch_root)
+
+
+def finalize_run(scratch_dir, output_root, name):
+    """
+    Move the files of a finished run from its scratch directory into a new
+    `output_root/<name>` directory (with a numeric suffix if needed).
+
+    :return: The path of the final output directory.
+    """
+    target_dir = unique_directory(os.path.join(output_root, name))
+    for entry in os.listdir(scratch_dir):
+        shutil.move(os.path.join(scratch_dir, entry), target_dir)
+    os.rmdir(scratch_dir)
+    return target_dir
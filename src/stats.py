@@ -0,0 +1,156 @@
+import json
+import os
+import re
+
+# "  0.000313329s [ 13.7%] pre-initialization" (percentage is optional)
+TIMER_LINE = re.compile(
+    r"^\s*([-+\d.eE]+)s\s+(?:\[\s*([\d.]+)%\]\s+)?(.+?)\s*$")
+# "    0 state events", "   22 steps taken"
+COUNT_LINE = re.compile(r"^\s*(\d+)\s+(.+?)\s*$")
+# "6.855e-06s time of jacobian evaluation"
+SOLVER_TIME_LINE = re.compile(r"^\s*([-+\d.eE]+)s\s+(.+?)\s*$")
+# Strip the "LOG_STATS | info | " prefix of the runtime's log format and
+# the "|  | |  | |" markers it puts in front of nested lines.
+LOG_PREFIX = re.compile(r"^\s*LOG_\w+\s*\|\s*\w+\s*\|")
+NESTING = re.compile(r"^[\s|]+")
+
+METRICS_FILE = "metrics.json"
+
+SECTIONS = ("timer", "events")
+
+
+def _key(label):
+    """
+    Turn a statistics label into a snake_case metric name.
+    """
+    label = label.replace("(excl. callbacks)", "")
+    return re.sub(r"[^0-9a-z]+", "_", label.lower()).strip("_")
+
+
+class StatsParser:
+    """
+    An incremental parser for the `### STATISTICS ###` block printed by
+    the OpenModelica runtime with `-lv=LOG_STATS`.
+
+    Lines are fed one at a time, so the parser can sit next to the output
+    monitor of a running simulation. The result is a flat-ish record:
+
+        {"timer": {"pre_initialization": {"seconds": ..., "percent": ...},
+                   ...,
+                   "total": {...}},
+         "events": {"state_events": 0, "time_events": 0},
+         "solver": {"name": "dassl", "steps_taken": 22, ...,
+                    "time_of_jacobian_evaluation": 6.855e-06}}
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self._section = None
+
+    def feed(self, line):
+        """
+        Process one line of model output.
+        """
+        line = NESTING.sub("", LOG_PREFIX.sub("", line)).rstrip()
+        if not line:
+            return
+        if line == "### STATISTICS ###":
+            self._section = "start"
+            return
+        if self._section is None:
+            return
+
+        if line in SECTIONS:
+            self._section = line
+            self.metrics.setdefault(line, {})
+            return
+        if line.startswith("solver:"):
+            self._section = "solver"
+            self.metrics["solver"] = {"name": line.split(":", 1)[1].strip()}
+            return
+
+        if self._section == "timer":
+            match = TIMER_LINE.match(line)
+            if match:
+                seconds, percent, label = match.groups()
+                entry = {"seconds": float(seconds)}
+                if percent is not None:
+                    entry["percent"] = float(percent)
+                self.metrics["timer"][_key(label)] = entry
+                return
+        elif self._section in ("events", "solver"):
+            match = COUNT_LINE.match(line)
+            if match:
+                self.metrics[self._section][_key(match.group(2))] = int(
+                    match.group(1))
+                return
+            match = SOLVER_TIME_LINE.match(line)
+            if match and self._section == "solver":
+                self.metrics["solver"][_key(match.group(2))] = float(
+                    match.group(1))
+                return
+
+        # Anything else ends the statistics block.
+        self._section = None
+
+    @property
+    def found(self):
+        """
+        True if a statistics block was seen.
+        """
+        return bool(self.metrics)
+
+
+def parse_stats(text):
+    """
+    Parse the statistics block out of a complete model log or stdout.
+
+    :return: The metrics record, empty if the text contains no statistics.
+    """
+    parser = StatsParser()
+    for line in text.splitlines():
+        parser.feed(line)
+    return parser.metrics
+
+
+def format_stats(metrics):
+    """
+    Format a metrics record as a short multi-line summary.
+    """
+    lines = []
+    timer = metrics.get("timer", {})
+    for name in ("initialization", "simulation", "total"):
+        if name in timer:
+            lines.append(f"{name.replace('_', ' ').capitalize()}: "
+                         f"{timer[name]['seconds']:.4g}s")
+    solver = metrics.get("solver", {})
+    if solver:
+        details = ", ".join(
+            f"{value} {name.replace('_', ' ')}"
+            for name, value in solver.items()
+            if name != "name" and isinstance(value, int))
+        lines.append(f"Solver {solver.get('name', '?')}: {details}")
+    events = metrics.get("events", {})
+    if events:
+        lines.append("Events: " + ", ".join(
+            f"{value} {name.replace('_', ' ')}" for name, value in events.items()))
+    return "\n".join(lines)
+
+
+def save_metrics(metrics, run_dir):
+    """
+    Store a metrics record as `metrics.json` in a run directory.
+    """
+    with open(os.path.join(run_dir, METRICS_FILE), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+
+def load_metrics(run_dir):
+    """
+    Load the metrics record of a run, or an empty dict if it has none.
+    """
+    try:
+        with open(os.path.join(run_dir, METRICS_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
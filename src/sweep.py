@@ -0,0 +1,145 @@
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from decimal import Decimal, InvalidOperation
+
+from src.monitor import OutputMonitor
+from src.simulation import run_model, unique_directory
+
+
+def parse_values(spec):
+    """
+    Parse the value specification of a single sweep parameter.
+
+    Two forms are accepted:
+      - a comma separated list, e.g. `0.5,1,2`
+      - an inclusive range `start:stop:step`, e.g. `0:100:10`
+
+    :spec: The specification string.
+    :return: The list of values as strings, ready for `-override`.
+    """
+    spec = spec.strip()
+    if ":" not in spec:
+        values = [value.strip() for value in spec.split(",") if value.strip()]
+        if not values:
+            raise ValueError(f"No values given in '{spec}'")
+        return values
+
+    parts = spec.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Range '{spec}' must have the form start:stop:step")
+    # Decimal arithmetic passes every point exactly as written, e.g.
+    # 0.3 rather than 0.30000000000000004, and 1000001 rather than 1e+06.
+    try:
+        start, stop, step = (Decimal(part.strip()) for part in parts)
+    except InvalidOperation:
+        raise ValueError(f"Range '{spec}' must hold three numbers") from None
+    if not all(value.is_finite() for value in (start, stop, step)):
+        raise ValueError(f"Range '{spec}' must hold three finite numbers")
+    if step <= 0:
+        raise ValueError(f"Step of range '{spec}' must be positive")
+    if stop < start:
+        raise ValueError(f"Range '{spec}' ends before it starts")
+
+    count = int((stop - start) / step) + 1
+    return [f"{start + i * step:f}" for i in range(count)]
+
+
+def expand_grid(parameters):
+    """
+    Expand per-parameter value lists into the full grid of combinations.
+
+    :parameters: Mapping of overridable names to lists of values.
+    :return: A list of dicts, one per grid point, in a stable order.
+    """
+    names = list(parameters)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(parameters[name] for name in names))
+    ]
+
+
+def _run_point(exe_path, overrides, point_dir, options):
+    """
+    Run a single grid point inside its own output directory.
+    """
+    monitor = OutputMonitor()
+    returncode = run_model(exe_path, overrides, point_dir,
+                           on_stdout=monitor.feed, on_stderr=monitor.feed,
+                           **options)
+    return returncode, returncode == 0 and monitor.succeeded
+
+
+def run_sweep(exe_path, parameters, base_overrides=None, output_root="output",
+              max_workers=None, on_point_done=None, timeout=None,
+              cancel_event=None, limits=None):
+    """
+    Run a model executable over the full grid of the given parameters.
+
+    Every grid point is launched with its own `-override` set and writes
+    its result, stdout and the runtime's output files into a dedicated
+    `point_NNNN` directory of a new sweep directory under `output_root`.
+    The points are executed on a bounded thread pool; each worker thread
+    only waits on its model process, so the pool size directly bounds the
+    number of concurrently running simulations.
+
+    :exe_path: Path to the model executable.
+    :parameters: Mapping of overridable names to lists of values.
+    :base_overrides: Overrides shared by every point (e.g. `startTime`).
+    :output_root: Directory in which the sweep directory is created.
+    :max_workers: Size of the pool, defaults to the number of CPU cores.
+    :on_point_done: Called with each point's summary dict as it finishes.
+    :timeout: Wall-clock limit of each point in seconds.
+    :cancel_event: A `threading.Event` that cancels all remaining points.
+    :limits: Resource limits of each point, see `simulation.execute`.
+    :return: The sweep directory and the list of point summaries.
+    """
+    exe_path = os.path.abspath(exe_path)
+    grid = expand_grid(parameters)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    name = os.path.splitext(os.path.basename(exe_path))[0]
+    sweep_dir = unique_directory(
+        os.path.abspath(os.path.join(output_root, f"{name}_sweep")))
+    logging.info("Sweep of %s: %d points on %d workers in %s",
+                 name, len(grid), max_workers, sweep_dir)
+
+    options = {"timeout": timeout, "cancel_event": cancel_event,
+               "limits": limits}
+    points = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for index, point in enumerate(grid):
+            overrides = dict(base_overrides or {})
+            overrides.update(point)
+            point_dir = os.path.join(sweep_dir, f"point_{index:04d}")
+            os.mkdir(point_dir)
+            future = pool.submit(
+                _run_point, exe_path, overrides, point_dir, options)
+            futures[future] = {
+                "index": index,
+                "overrides": overrides,
+                "directory": point_dir,
+            }
+
+        for future in as_completed(futures):
+            summary = futures[future]
+            try:
+                summary["returncode"], summary["success"] = future.result()
+            except Exception as e:
+                logging.error("Sweep point %d failed to run: %s",
+                              summary["index"], e)
+                summary["returncode"], summary["success"] = None, False
+            if on_point_done:
+                on_point_done(summary)
+            points.append(summary)
+
+    points.sort(key=lambda summary: summary["index"])
+    with open(os.path.join(sweep_dir, "sweep.json"), "w") as f:
+        json.dump({"executable": exe_path, "points": points}, f, indent=2)
+    logging.info("Sweep finished: %d/%d points successful",
+                 sum(summary["success"] for summary in points), len(points))
+    return sweep_dir, points